@@ -1,5 +1,6 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -9,6 +10,11 @@ DB_NAME = "postgres"
 DB_USER = "postgres"
 DB_PASS = os.environ["POSTGRES_PASSWORD"]
 
+# calculate_smart_rent does the work server-side, one statement per
+# connection at a time, so batches only overlap across connections. Each
+# worker thread drains batches on its own autocommit connection.
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+
 def get_db_connection():
     return psycopg2.connect(
         host=DB_HOST,
@@ -17,6 +23,63 @@ def get_db_connection():
         password=DB_PASS
     )
 
+BATCH_SIZE = 500
+
+# Claim a batch and estimate it in one statement. SKIP LOCKED hands
+# concurrent workers (threads here, or a second daemon) disjoint batches
+# without a separate SELECT to coordinate them, and each autocommit
+# statement releases its locks as it finishes.
+#
+# Update using the fallback + smart logic combo via the SQL function
+# v2: Now passes property_type for non-rentable detection. A 0 estimate is
+# stored as -1 like a missing one: 0 still matches the pending predicate,
+# so the row would otherwise be claimed again forever.
+#
+# The pending predicate is served by the partial index idx_listings_rent_backfill
+# (migrations/out-of-band/2026_10_15_listings_rent_backfill_idx.sql); keep
+# the two identical.
+BATCH_QUERY = """
+    WITH batch AS (
+        SELECT id FROM listings 
+        WHERE (estimated_rent IS NULL OR estimated_rent = 0) 
+        AND listing_status = 'FOR_SALE' 
+        AND latitude IS NOT NULL AND longitude IS NOT NULL
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE listings l
+    SET estimated_rent = COALESCE(
+        NULLIF((calculate_smart_rent(
+            l.latitude, 
+            l.longitude, 
+            l.bedrooms::integer, 
+            l.bathrooms, 
+            l.sqft::integer, 
+            l.zip_code,
+            l.property_type
+        )->>'active_estimate')::numeric, 0),
+        -1
+    )
+    FROM batch
+    WHERE l.id = batch.id
+"""
+
+def drain_batches():
+    """Claim and estimate batches until none are left; returns rows updated."""
+    conn = get_db_connection()
+    conn.autocommit = True
+    processed = 0
+    try:
+        with conn.cursor() as cur:
+            while True:
+                cur.execute(BATCH_QUERY, (BATCH_SIZE,))
+                if cur.rowcount <= 0:
+                    return processed
+                processed += cur.rowcount
+                print(f"Processed batch of {cur.rowcount}.")
+    finally:
+        conn.close()
+
 def backfill_rent():
     print("Starting smart rent backfill service (Daemon Mode)...")
     
@@ -38,50 +101,12 @@ def backfill_rent():
                 
             print(f"Found {count} properties needing rent estimation.")
             
-            # Process in batches
-            batch_size = 500
-            total_processed = 0
-            
-            while True:
-                # Select batch of IDs that need update
-                # Order by last_updated or random to ensure we don't get stuck on the same bad rows
-                cur.execute("""
-                    SELECT id FROM listings 
-                    WHERE (estimated_rent IS NULL OR estimated_rent = 0) 
-                    AND listing_status = 'FOR_SALE' 
-                    AND latitude IS NOT NULL AND longitude IS NOT NULL
-                    LIMIT %s
-                """, (batch_size,))
-                
-                rows = cur.fetchall()
-                if not rows:
-                    break
-                    
-                ids = [row[0] for row in rows]
-                
-                # Update using the fallback + smart logic combo via the SQL function
-                # v2: Now passes property_type for non-rentable detection
-                update_query = """
-                    UPDATE listings 
-                    SET estimated_rent = COALESCE(
-                        (calculate_smart_rent(
-                            latitude, 
-                            longitude, 
-                            bedrooms::integer, 
-                            bathrooms, 
-                            sqft::integer, 
-                            zip_code,
-                            property_type
-                        )->>'active_estimate')::numeric,
-                        -1
-                    )
-                    WHERE id = ANY(%s::uuid[])
-                """
-                
-                cur.execute(update_query, (ids,))
-                total_processed += len(ids)
-                print(f"Processed batch of {len(ids)}. Total this run: {total_processed}")
-                
+            # Process in batches, BACKFILL_WORKERS at a time.
+            with ThreadPoolExecutor(max_workers=BACKFILL_WORKERS) as pool:
+                futures = [pool.submit(drain_batches) for _ in range(BACKFILL_WORKERS)]
+                total_processed = sum(f.result() for f in futures)
+
+            print(f"Processed {total_processed} this run.")
             print("Batch run complete.")
             conn.close()
             
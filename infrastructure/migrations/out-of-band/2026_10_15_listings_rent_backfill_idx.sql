@@ -0,0 +1,32 @@
+-- OUT-OF-BAND: supports the batch claim in infrastructure/backfill_rent.py:
+--
+--   SELECT id FROM listings
+--    WHERE (estimated_rent IS NULL OR estimated_rent = 0)
+--      AND listing_status = 'FOR_SALE'
+--      AND latitude IS NOT NULL AND longitude IS NOT NULL
+--    LIMIT 500 FOR UPDATE SKIP LOCKED
+--
+-- (plus the count(*) over the same predicate at the top of each run). The
+-- daemon repeats this until nothing is pending, and with no matching index
+-- each claim walks listings past every already-estimated row to find 500
+-- pending ones. The partial index holds only the pending rows, so a claim
+-- reads the first 500 entries and the count is an index-only scan. Rows
+-- leave the index as they get an estimate, so it stays small.
+--
+-- The WHERE clause must stay identical to BATCH_QUERY's predicate or the
+-- planner cannot use the index.
+--
+-- CONCURRENTLY cannot run inside a transaction, so this CANNOT be a normal
+-- migration (the `pnpm migrate` runner wraps each top-level file in BEGIN/
+-- COMMIT and would abort). Run by hand against prod (off-peak).
+--
+-- If a previous attempt failed it can leave an INVALID index; drop it first:
+--   DROP INDEX CONCURRENTLY IF EXISTS idx_listings_rent_backfill;
+--
+-- Run:
+--   psql "$DATABASE_URL" -f 2026_10_15_listings_rent_backfill_idx.sql
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_listings_rent_backfill
+    ON listings (id)
+    WHERE (estimated_rent IS NULL OR estimated_rent = 0)
+      AND listing_status = 'FOR_SALE'
+      AND latitude IS NOT NULL AND longitude IS NOT NULL;
@@ -0,0 +1,29 @@
+-- OUT-OF-BAND: supports the PadMapper dedupe pre-fetch in
+-- services/scraper_service/main.py (_scrape_padmapper):
+--
+--   SELECT DISTINCT <norm(address)> FROM rental_listings
+--    WHERE <norm(address)> = ANY($1)
+--      AND listing_date > now() - interval '14 days'
+--
+-- where <norm(address)> is ADDRESS_NORM_SQL,
+-- lower(regexp_replace(trim(address), '\s+', ' ', 'g')). The pre-fetch used
+-- to pull every normalized address stored in the last 14 days, across all
+-- ZIPs, on every PadMapper scrape, so its cost grew with the table. It now
+-- asks only about the addresses in the current response. This expression
+-- index makes that an index probe per address. Cross-source dedupe still
+-- matches case- and whitespace-insensitively.
+--
+-- The expression must stay byte-identical to ADDRESS_NORM_SQL or the planner
+-- will not use the index.
+--
+-- CONCURRENTLY cannot run inside a transaction, so this CANNOT be a normal
+-- migration (the `pnpm migrate` runner wraps each top-level file in BEGIN/
+-- COMMIT and would abort). Run by hand against prod (off-peak).
+--
+-- If a previous attempt failed it can leave an INVALID index; drop it first:
+--   DROP INDEX CONCURRENTLY IF EXISTS idx_rental_address_norm_date;
+--
+-- Run:
+--   psql "$DATABASE_URL" -f 2026_10_15_rental_address_norm_idx.sql
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_rental_address_norm_date
+    ON rental_listings (lower(regexp_replace(trim(address), '\s+', ' ', 'g')), listing_date);
@@ -0,0 +1,27 @@
+-- OUT-OF-BAND: supports the rental scheduler's last-scrape lookup
+-- (services/scrape_rentals_scheduler.py get_last_scrape_times):
+--
+--   SELECT city, MAX(created_at) FROM rental_listings
+--    WHERE city = ANY($1) GROUP BY city
+--
+-- It replaced one `city ILIKE '%<city>%' ORDER BY created_at DESC LIMIT 1`
+-- per market, which no btree can serve and which seq-scanned rental_listings
+-- every time. With (city, created_at DESC) each city's MAX is the first entry
+-- of its index range, so the lookup no longer grows with the table. The
+-- scheduler's local state file means this only runs on cold start or for new
+-- markets, but a cold start after a container rebuild asks for every market.
+--
+-- City is matched exactly: markets are "City, ST" and HomeHarvest writes the
+-- same title-cased city, so no LOWER(city) expression index is needed.
+--
+-- CONCURRENTLY cannot run inside a transaction, so this CANNOT be a normal
+-- migration (the `pnpm migrate` runner wraps each top-level file in BEGIN/
+-- COMMIT and would abort). Run by hand against prod (off-peak).
+--
+-- If a previous attempt failed it can leave an INVALID index; drop it first:
+--   DROP INDEX CONCURRENTLY IF EXISTS idx_rental_city_created;
+--
+-- Run:
+--   psql "$DATABASE_URL" -f 2026_10_15_rental_city_created_idx.sql
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_rental_city_created
+    ON rental_listings (city, created_at DESC);
@@ -0,0 +1,102 @@
+"""
+Local scraper state that never needs to round-trip through Postgres.
+
+- state: "last scraped" timestamps for scrape_rentals_scheduler. Only the
+  scheduler itself ever writes these, so there is no reason to ask Postgres
+  every cycle. rental_listings is only consulted for cities this file has
+  never seen (cold start, fresh container, deleted file).
+- seen: 64-bit hashes of (address, price, status) rows scraper.py already
+  uploaded, so day-2+ runs skip geocoding and writing listings that have not
+  changed since.
+
+Both live in one small SQLite file next to the services.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+STATE_PATH = os.getenv(
+    "SCRAPE_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".scrape_state.sqlite3"),
+)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(STATE_PATH, timeout=10)
+    conn.execute("CREATE TABLE IF NOT EXISTS state (city TEXT PRIMARY KEY, last_scrape REAL NOT NULL)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS seen ("
+        "kind TEXT NOT NULL, h INTEGER NOT NULL, ts REAL NOT NULL, PRIMARY KEY (kind, h))"
+    )
+    return conn
+
+
+def load() -> dict[str, datetime]:
+    """All known cities -> last scrape time (UTC). Empty if the file is unusable."""
+    try:
+        conn = _connect()
+        try:
+            rows = conn.execute("SELECT city, last_scrape FROM state").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not read scrape state {STATE_PATH}: {e}")
+        return {}
+    return {city: datetime.fromtimestamp(ts, tz=timezone.utc) for city, ts in rows}
+
+
+def mark(city: str, when: float | None = None) -> None:
+    """Record a successful scrape of city (defaults to now)."""
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO state (city, last_scrape) VALUES (?, ?) "
+                    "ON CONFLICT(city) DO UPDATE SET last_scrape = excluded.last_scrape",
+                    (city, time.time() if when is None else when),
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not write scrape state {STATE_PATH}: {e}")
+
+
+def seen_hashes(kind: str, max_age_days: float = 7) -> set[int]:
+    """Row hashes of this kind (e.g. target table) recorded in the last max_age_days.
+
+    Older entries are pruned on the way, so the table stays a rolling window.
+    """
+    cutoff = time.time() - max_age_days * 86400
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM seen WHERE ts < ?", (cutoff,))
+            rows = conn.execute("SELECT h FROM seen WHERE kind = ?", (kind,)).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not read scrape state {STATE_PATH}: {e}")
+        return set()
+    return {h for (h,) in rows}
+
+
+def mark_seen(kind: str, hashes) -> None:
+    """Record row hashes (signed 64-bit ints) as uploaded now."""
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO seen (kind, h, ts) VALUES (?, ?, ?) "
+                    "ON CONFLICT(kind, h) DO UPDATE SET ts = excluded.ts",
+                    ((kind, int(h), now) for h in hashes),
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not write scrape state {STATE_PATH}: {e}")
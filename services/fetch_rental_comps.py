@@ -4,7 +4,7 @@ import json
 import pandas as pd
 import sys
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
 from homeharvest import scrape_property
 from dotenv import load_dotenv
 
@@ -100,7 +100,64 @@ def process_rental(row):
         print(f"Error processing rental: {e}", file=sys.stderr)
         return None
 
-def fetch_rentals(location, past_days=30):
+RENTAL_COLUMNS = (
+    "address", "zip_code", "city", "state", "price", "bedrooms", "bathrooms", "sqft",
+    "property_type", "latitude", "longitude", "year_built", "lot_sqft", "hoa_fee",
+    "days_on_market", "parking_garage", "has_ac", "has_pool", "pet_friendly",
+    "source", "raw_data",
+)
+
+# One multi-row statement per page instead of a round-trip per listing.
+# rental_listings is unique on (address, source, listing_date); listing_date
+# defaults to today, so a same-day re-scrape updates the row in place.
+UPSERT_RENTALS_SQL = f"""
+    INSERT INTO rental_listings ({', '.join(RENTAL_COLUMNS)}, created_at, updated_at)
+    VALUES %s
+    ON CONFLICT (address, source, listing_date) DO UPDATE SET
+        price = EXCLUDED.price,
+        days_on_market = EXCLUDED.days_on_market,
+        updated_at = NOW()
+"""
+UPSERT_RENTALS_TEMPLATE = "(" + ", ".join(["%s"] * len(RENTAL_COLUMNS)) + ", NOW(), NOW())"
+
+def upsert_rows(conn, rows):
+    """Upsert rows (RENTAL_COLUMNS tuples) in one batch and commit.
+
+    If the batch fails it is rolled back and replayed row by row, so one bad
+    row only costs itself rather than the whole market. Returns the number
+    of rows written.
+    """
+    try:
+        with conn.cursor() as cursor:
+            execute_values(cursor, UPSERT_RENTALS_SQL, rows,
+                           template=UPSERT_RENTALS_TEMPLATE, page_size=500)
+        conn.commit()
+        return len(rows)
+    except Exception as e:
+        conn.rollback()
+        print(f"Batch processing error: {e}; retrying {len(rows)} rows individually", file=sys.stderr)
+
+    written = 0
+    for row in rows:
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, UPSERT_RENTALS_SQL, [row], template=UPSERT_RENTALS_TEMPLATE)
+            conn.commit()
+            written += 1
+        except Exception as e:
+            conn.rollback()
+            print(f"Insert error for {row[0]}: {e}", file=sys.stderr)
+    return written
+
+def fetch_rentals(location, past_days=30, conn=None):
+    """Scrape for-rent listings for location and upsert them into rental_listings.
+
+    Pass conn to reuse a caller-owned (e.g. pooled) connection; it is
+    committed but not closed. Otherwise a connection is opened and closed here.
+    Returns the number of rows written. Raises if nothing could be written
+    (no DB connection, every row failed), so callers never record a market
+    as scraped when its rows did not land.
+    """
     print(f"Fetching rentals for {location}...", file=sys.stderr)
     
     properties = scrape_property(
@@ -111,7 +168,7 @@ def fetch_rentals(location, past_days=30):
     
     if properties is None or properties.empty:
         print(json.dumps({"message": "No rentals found", "count": 0}))
-        return
+        return 0
 
     # Calculate baths if needed
     df = properties
@@ -123,57 +180,35 @@ def fetch_rentals(location, past_days=30):
         if 'baths' not in df.columns:
             df['baths'] = None
 
-    inserted_count = 0
-    conn = get_db_connection()
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement,
+    # so keep the last occurrence of each address.
+    rows = {}
+    for index, row in df.iterrows():
+        data = process_rental(row)
+        if data:
+            rows[data['address']] = tuple(data[c] for c in RENTAL_COLUMNS)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
     
     if not conn:
-        print("Failed to connect to DB, skipping insertions")
-        return
+        raise RuntimeError(f"Failed to connect to DB; no rentals written for {location}")
 
-    cursor = conn.cursor()
-    
     try:
-        for index, row in df.iterrows():
-            data = process_rental(row)
-            if data:
-                try:
-                    # Upsert rental listing
-                    query = """
-                        INSERT INTO rental_listings (
-                            address, zip_code, city, state, price, bedrooms, bathrooms, sqft,
-                            property_type, latitude, longitude, year_built, lot_sqft, hoa_fee,
-                            days_on_market, parking_garage, has_ac, has_pool, pet_friendly,
-                            source, raw_data, created_at, updated_at
-                        ) VALUES (
-                            %(address)s, %(zip_code)s, %(city)s, %(state)s, %(price)s, %(bedrooms)s, %(bathrooms)s, %(sqft)s,
-                            %(property_type)s, %(latitude)s, %(longitude)s, %(year_built)s, %(lot_sqft)s, %(hoa_fee)s,
-                            %(days_on_market)s, %(parking_garage)s, %(has_ac)s, %(has_pool)s, %(pet_friendly)s,
-                            %(source)s, %(raw_data)s, NOW(), NOW()
-                        )
-                        ON CONFLICT (address) DO UPDATE SET
-                            price = EXCLUDED.price,
-                            days_on_market = EXCLUDED.days_on_market,
-                            updated_at = NOW();
-                    """
-                    cursor.execute(query, data)
-                    inserted_count += 1
-                except Exception as e:
-                    print(f"Error inserting {data['address']}: {e}", file=sys.stderr)
-                    conn.rollback() # Rollback tuple error to allow continuing
-        
-        conn.commit()
-    except Exception as e:
-        print(f"Batch processing error: {e}", file=sys.stderr)
-        conn.rollback()
+        inserted_count = upsert_rows(conn, list(rows.values()))
     finally:
-        cursor.close()
-        conn.close()
+        if own_conn:
+            conn.close()
+    if rows and not inserted_count:
+        raise RuntimeError(f"No rentals written for {location}: all {len(rows)} rows failed")
 
     print(json.dumps({
         "message": "Rental fetch complete",
         "found": len(df),
         "inserted": inserted_count
     }))
+    return inserted_count
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -23,6 +23,11 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 CENSUS_BENCHMARK = 'Public_AR_Current'
 
+# One keep-alive session for every geocoding call. A bare requests.get opens
+# a fresh TCP+TLS connection per address; the session reuses them.
+_http = requests.Session()
+_http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=10))
+
 def geocode_address(address):
     """Geocodes via Census Bureau (no rate limit), falls back to Nominatim (1 req/sec)."""
     if not address:
@@ -32,7 +37,7 @@ def geocode_address(address):
     try:
         encoded = urllib.parse.quote(address)
         url = f"https://geocoding.geo.census.gov/geocoder/locations/onelineaddress?address={encoded}&benchmark={CENSUS_BENCHMARK}&format=json"
-        resp = requests.get(url, timeout=10)
+        resp = _http.get(url, timeout=10)
         if resp.status_code == 200:
             data = resp.json()
             matches = data.get('result', {}).get('addressMatches', [])
@@ -46,7 +51,7 @@ def geocode_address(address):
     try:
         encoded = urllib.parse.quote(address)
         url = f"https://nominatim.openstreetmap.org/search?q={encoded}&format=json&limit=1"
-        resp = requests.get(url, headers={'User-Agent': 'OnePercentRealEstate/1.0'}, timeout=10)
+        resp = _http.get(url, headers={'User-Agent': 'OnePercentRealEstate/1.0'}, timeout=10)
         if resp.status_code == 200:
             data = resp.json()
             if data:
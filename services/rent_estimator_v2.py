@@ -19,7 +19,14 @@ Features:
 import os
 import sys
 import json
+import logging
 import math
+import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
 from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -27,21 +34,23 @@ from datetime import datetime, timedelta
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import numpy as np
 import psycopg2
-from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
 # Load environment
 env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../.env.local')
 load_dotenv(dotenv_path=env_path)
 
+log = logging.getLogger(__name__)
+
 # Optional ML imports
 try:
     from ml_rent_estimator.predict import predict_rent as ml_predict_rent
     HAS_ML_MODEL = True
 except ImportError:
     HAS_ML_MODEL = False
-    print("Warning: ML model not available. Will use HUD + Comps only.")
+    log.warning("ML model not available. Will use HUD + Comps only.")
 
 
 # Database connection
@@ -55,6 +64,10 @@ if not DATABASE_URL:
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 
+# Radius estimate_rent_v2 searches for rental comps. Wider than the
+# get_scraped_comps default so thin markets still find a handful.
+COMPS_RADIUS_MILES = 50.0
+
 # Non-rentable property types
 NON_RENTABLE_TYPES = {
     'LAND', 'LOT', 'LOTS', 'VACANT', 'VACANT_LAND', 'LOTS/LAND',
@@ -114,8 +127,8 @@ def get_db_pool():
                 maxconn=20,
                 dsn=DATABASE_URL
             )
-        except Exception as e:
-            print(f"Error creating connection pool: {e}")
+        except Exception:
+            log.exception("Error creating connection pool")
     return _connection_pool
 
 def get_db_connection():
@@ -125,11 +138,11 @@ def get_db_connection():
         try:
             return pool.getconn()
         except Exception as e:
-            print(f"Error getting connection from pool: {e}")
+            log.warning("Error getting connection from pool: %s", e)
     try:
         return psycopg2.connect(DATABASE_URL)
-    except Exception as e:
-        print(f"Database connection error: {e}")
+    except Exception:
+        log.exception("Database connection error")
         return None
 
 def release_db_connection(conn):
@@ -147,14 +160,46 @@ def release_db_connection(conn):
         except Exception:
             pass
 
+EARTH_RADIUS_MILES = 3958.8
+
+
+def make_haversine(lat1: float, lon1: float):
+    """Return a distance-in-miles function anchored at (lat1, lon1).
+
+    The query point is fixed for a whole comps scan, so its radians and cosine
+    are computed once here instead of once per candidate. asin(sqrt(a)) is the
+    same great-circle angle as atan2(sqrt(a), sqrt(1-a)) with one sqrt fewer.
+    """
+    rlat1 = math.radians(lat1)
+    clat1 = math.cos(rlat1)
+
+    def distance(lat2: float, lon2: float) -> float:
+        rlat2 = math.radians(lat2)
+        dlat = rlat2 - rlat1
+        dlon = math.radians(lon2 - lon1)
+        a = math.sin(dlat / 2) ** 2 + clat1 * math.cos(rlat2) * math.sin(dlon / 2) ** 2
+        return EARTH_RADIUS_MILES * 2 * math.asin(math.sqrt(a))
+
+    return distance
+
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate distance in miles between two points."""
-    R = 3958.8  # Earth radius in miles
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
+    return make_haversine(lat1, lon1)(lat2, lon2)
+
+
+def haversine_many(lat1: float, lon1: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized make_haversine: miles from (lat1, lon1) to every (lats, lons).
+
+    The comps box can hold thousands of rentals at the 50-mile search radius;
+    one pass of NumPy ufuncs replaces a Python-level trig call per candidate.
+    """
+    rlat1 = math.radians(lat1)
+    rlat2 = np.radians(lats)
+    dlat = rlat2 - rlat1
+    dlon = np.radians(lons - lon1)
+    a = np.sin(dlat / 2) ** 2 + math.cos(rlat1) * np.cos(rlat2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(a))
 
 _NON_RENTABLE_TYPES = None
 
@@ -172,8 +217,8 @@ def get_non_rentable_types() -> set:
             rows = cur.fetchall()
             _NON_RENTABLE_TYPES = {row[0].upper().strip() for row in rows}
             return _NON_RENTABLE_TYPES
-        except Exception as e:
-            print(f"Error querying property_type_rules: {e}")
+        except Exception:
+            log.exception("Error querying property_type_rules")
         finally:
             release_db_connection(conn)
             
@@ -195,46 +240,143 @@ def is_non_rentable(property_type: Optional[str]) -> bool:
     return False
 
 
-def get_hud_safmr(zip_code: str, bedrooms: int) -> Optional[float]:
-    """Fetch HUD SAFMR from the hud_safmr table (ZIP x bedrooms x FY).
+def _clean_zip(zip_code) -> str:
+    if isinstance(zip_code, float):
+        return str(int(zip_code))
+    return str(zip_code).split('.')[0].strip()
 
-    Wave 2: previously read market_benchmarks, which held exactly 1 row —
-    the federal floor never fired. hud_safmr is loaded from the huduser.gov
-    SAFMR file (193K rows, 38.6K ZIPs) by ml_rent_estimator/load_hud_safmr.py.
-    """
+
+# hud_safmr only changes when a new FY file is loaded, and within one batch or
+# one ML-service lifetime the same (ZIP, bedrooms) pairs come up over and over.
+# Restart the process (or call _hud_safmr_lookup.cache_clear()) after a reload.
+HUD_CACHE_MAX_ENTRIES = 4096
+
+
+@lru_cache(maxsize=HUD_CACHE_MAX_ENTRIES)
+def _hud_safmr_lookup(zip_code: str, bedrooms: int) -> Optional[float]:
+    """Uncached query behind get_hud_safmr. Raises on DB trouble so that
+    failures are never memoized -- only real answers (including "no row")."""
     conn = get_db_connection()
     if not conn:
-        return None
+        raise RuntimeError("no database connection")
 
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Clean zip code
-        if isinstance(zip_code, float):
-            zip_code = str(int(zip_code))
-        else:
-            zip_code = str(zip_code).split('.')[0].strip()
-
+        cur = conn.cursor()
         cur.execute(
             """
             SELECT safmr FROM hud_safmr
-            WHERE zip_code = %s AND bedrooms = LEAST(GREATEST(%s, 0), 4)
+            WHERE zip_code = %s AND bedrooms = %s
             ORDER BY fy DESC
             LIMIT 1
             """,
-            (zip_code, int(bedrooms or 0)),
+            (zip_code, bedrooms),
         )
-
         row = cur.fetchone()
-        if row and row["safmr"] is not None:
-            return float(row["safmr"])
-
-    except Exception as e:
-        print(f"Error fetching HUD SAFMR: {e}")
+        return float(row[0]) if row and row[0] is not None else None
     finally:
         release_db_connection(conn)
 
-    return None
+
+def get_hud_safmr(zip_code: str, bedrooms: int) -> Optional[float]:
+    """Fetch HUD SAFMR from the hud_safmr table (ZIP x bedrooms x FY).
+
+    Wave 2: previously read market_benchmarks, which held exactly 1 row —
+    the federal floor never fired. hud_safmr is loaded from the huduser.gov
+    SAFMR file (193K rows, 38.6K ZIPs) by ml_rent_estimator/load_hud_safmr.py.
+
+    Cached per (ZIP, bedrooms); bedrooms is clamped to SAFMR's 0-4 range
+    before the lookup so 4, 5 and 6 beds share one entry.
+    """
+    try:
+        return _hud_safmr_lookup(_clean_zip(zip_code), min(max(int(bedrooms or 0), 0), 4))
+    except Exception:
+        log.exception("Error fetching HUD SAFMR")
+        return None
+
+
+def _comp_box(lat: float, lon: float, radius_miles: float) -> Tuple[float, float, float, float]:
+    """Bounding box (lat_lo, lat_hi, lon_lo, lon_hi) enclosing radius_miles.
+
+    BOUNDING BOX FIRST, in SQL. Without it the comps query selected every
+    matching rental NATIONWIDE and threw away all but those within
+    radius_miles in Python — 5,000 calls x 513 ms = 2,565 s, the single
+    largest consumer of database time on the box (33-37% of a window,
+    tripping db-load-budget).
+
+    The box is a strict SUPERSET of the circle, and the haversine filter in
+    _select_comps still decides membership exactly, so results are unchanged.
+    It matches idx_rental_geo (latitude, longitude) WHERE both are NOT NULL.
+    """
+    lat_delta = radius_miles / 69.0
+    # A degree of longitude shrinks with latitude; clamp so the divisor
+    # cannot approach zero near the poles and blow the box up to the world.
+    cos_lat = max(0.05, math.cos(math.radians(lat)))
+    lon_delta = radius_miles / (69.0 * cos_lat)
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+
+def _select_comps(
+    lat: float,
+    lon: float,
+    bedrooms: int,
+    candidates: List[Tuple],
+    radius_miles: float,
+    max_comps: int,
+    hud_rent: Optional[float],
+) -> Tuple[Optional[float], List[Dict], int]:
+    """Score bounding-box candidates and return (median_rent, top comps, count).
+
+    candidates are plain row tuples (address, price, bedrooms, bathrooms,
+    sqft, latitude, longitude) — a RealDictCursor dict per row is measurable
+    once a box holds hundreds of rentals.
+    """
+    n = len(candidates)
+    if n == 0:
+        return None, [], 0
+    lats = np.fromiter((float(c[5]) for c in candidates), dtype=np.float64, count=n)
+    lons = np.fromiter((float(c[6]) for c in candidates), dtype=np.float64, count=n)
+    dists = haversine_many(lat, lon, lats, lons)
+
+    comps = []
+    # Only candidates inside the circle reach Python-level work.
+    for i in np.flatnonzero(dists <= radius_miles):
+        address, price, beds, baths, sqft, _, _ = candidates[i]
+        dist = float(dists[i])
+
+        # Scam filtering: discard if >30% below HUD
+        if hud_rent and price < hud_rent * 0.7:
+            continue  # Skip potential scam listing
+
+        # Calculate similarity score
+        score = 1.0 * (1 - dist / radius_miles)  # Distance weight
+        if beds == bedrooms:
+            score += 0.25
+        else:
+            score += 0.15
+
+        comps.append({
+            'address': address,
+            'price': float(price),
+            'beds': beds,
+            'baths': baths,
+            'sqft': sqft,
+            'distance': round(dist, 2),
+            'score': round(score, 2)
+        })
+
+    # Take top comps by score. nlargest is O(n log k) and keeps the same
+    # stable, highest-first order the old full sort + slice produced.
+    top_comps = nlargest(max_comps, comps, key=itemgetter('score'))
+
+    if not top_comps:
+        return None, [], 0
+
+    # Calculate weighted median (by similarity score)
+    prices = [c['price'] for c in top_comps]
+    prices.sort()
+    median_rent = prices[len(prices) // 2]
+
+    return median_rent, top_comps, len(top_comps)
 
 
 def get_scraped_comps(
@@ -257,28 +399,19 @@ def get_scraped_comps(
         return None, [], 0
     
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur = conn.cursor()
         
-        # Query nearby rentals
-        # BOUNDING BOX FIRST, in SQL. Without it this query selected every
-        # matching rental NATIONWIDE and threw away all but those within
-        # radius_miles in Python below — 5,000 calls x 513 ms = 2,565 s, the
-        # single largest consumer of database time on the box (33-37% of a
-        # window, tripping db-load-budget).
-        #
-        # The box is a strict SUPERSET of the circle, and the haversine filter
-        # below still decides membership exactly, so results are unchanged. It
-        # matches idx_rental_geo (latitude, longitude) WHERE both are NOT NULL.
-        lat_delta = radius_miles / 69.0
-        # A degree of longitude shrinks with latitude; clamp so the divisor
-        # cannot approach zero near the poles and blow the box up to the world.
-        cos_lat = max(0.05, math.cos(math.radians(lat)))
-        lon_delta = radius_miles / (69.0 * cos_lat)
+        # Query nearby rentals inside the bounding box (see _comp_box).
+        # lookback_days is bound as an integer into make_interval(): splicing
+        # it inside a quoted INTERVAL literal made the statement text depend
+        # on the value and left it injectable if the value ever came from a
+        # caller.
+        lat_lo, lat_hi, lon_lo, lon_hi = _comp_box(lat, lon, radius_miles)
 
         cur.execute("""
             SELECT 
                 address, price, bedrooms, bathrooms, sqft,
-                latitude, longitude, created_at
+                latitude, longitude
             FROM rental_listings
             WHERE 
                 latitude IS NOT NULL 
@@ -288,73 +421,80 @@ def get_scraped_comps(
                 AND price > 0
                 AND price < 10000
                 AND bedrooms BETWEEN %s AND %s
-                AND created_at > NOW() - INTERVAL '%s days'
-        """, (lat - lat_delta, lat + lat_delta,
-              lon - lon_delta, lon + lon_delta,
-              max(0, bedrooms - 1), bedrooms + 1, lookback_days))
+                AND created_at > NOW() - make_interval(days => %s)
+        """, (lat_lo, lat_hi, lon_lo, lon_hi,
+              max(0, bedrooms - 1), bedrooms + 1, int(lookback_days)))
         
         candidates = cur.fetchall()
+        return _select_comps(lat, lon, bedrooms, candidates,
+                             radius_miles, max_comps, hud_rent)
         
-        comps = []
-        for c in candidates:
-            dist = haversine_distance(lat, lon, float(c['latitude']), float(c['longitude']))
-            if dist <= radius_miles:
-                # Calculate similarity score
-                score = 1.0 * (1 - dist / radius_miles)  # Distance weight
-                if c['bedrooms'] == bedrooms:
-                    score += 0.25
-                else:
-                    score += 0.15
-                
-                comp = {
-                    'address': c['address'],
-                    'price': float(c['price']),
-                    'beds': c['bedrooms'],
-                    'baths': c['bathrooms'],
-                    'sqft': c['sqft'],
-                    'distance': round(dist, 2),
-                    'score': round(score, 2)
-                }
-                
-                # Scam filtering: discard if >30% below HUD
-                if hud_rent and c['price'] < hud_rent * 0.7:
-                    continue  # Skip potential scam listing
-                
-                comps.append(comp)
-        
-        # Sort by score and take top comps
-        comps.sort(key=lambda x: x['score'], reverse=True)
-        top_comps = comps[:max_comps]
-        
-        if not top_comps:
-            return None, [], 0
-        
-        # Calculate weighted median (by similarity score)
-        prices = [c['price'] for c in top_comps]
-        prices.sort()
-        median_rent = prices[len(prices) // 2]
-        
-        return median_rent, top_comps, len(top_comps)
-        
-    except Exception as e:
-        print(f"Error fetching comps: {e}")
+    except Exception:
+        log.exception("Error fetching comps")
         return None, [], 0
     finally:
         release_db_connection(conn)
 
 
+# Look-aside cache for ML predictions. Property features are effectively
+# static between crawls and the same listing is re-scored on every rent pass,
+# so a repeat call is a dict lookup instead of a model inference. Bounded LRU
+# with a TTL so a retrained model is picked up within a day.
+ML_CACHE_TTL_S = 24 * 3600
+ML_CACHE_MAX_ENTRIES = 100_000
+_ml_cache: "OrderedDict[Tuple, Tuple[float, Optional[float]]]" = OrderedDict()
+_ml_cache_lock = threading.Lock()  # ml/main.py serves /predict from a threadpool
+
+
+def _ml_cache_key(property_data: Dict[str, Any], hud_rent: Optional[float]) -> Tuple:
+    def r(v, nd):
+        return round(float(v), nd) if v is not None else None
+
+    return (
+        r(property_data.get('latitude'), 5),
+        r(property_data.get('longitude'), 5),
+        r(property_data.get('bedrooms'), 1),
+        r(property_data.get('bathrooms'), 1),
+        r(property_data.get('sqft'), 0),
+        r(property_data.get('year_built'), 0),
+        property_data.get('property_type'),
+        r(hud_rent, 0),
+    )
+
+
 def get_ml_prediction(property_data: Dict[str, Any], hud_rent: Optional[float] = None) -> Optional[float]:
     """Get ML model prediction if available."""
     if not HAS_ML_MODEL:
         return None
-    
+
+    try:
+        key = _ml_cache_key(property_data, hud_rent)
+    except (TypeError, ValueError):
+        key = None
+
+    now = time.monotonic()
+    if key is not None:
+        with _ml_cache_lock:
+            hit = _ml_cache.get(key)
+            if hit is not None and now - hit[0] < ML_CACHE_TTL_S:
+                _ml_cache.move_to_end(key)
+                return hit[1]
+
     try:
         result = ml_predict_rent(property_data, hud_rent=hud_rent)
-        return result.get('ml_estimate')
-    except Exception as e:
-        print(f"ML prediction error: {e}")
+        estimate = result.get('ml_estimate')
+    except Exception:
+        log.exception("ML prediction error")
         return None
 
+    if key is not None:
+        with _ml_cache_lock:
+            _ml_cache[key] = (now, estimate)
+            _ml_cache.move_to_end(key)
+            if len(_ml_cache) > ML_CACHE_MAX_ENTRIES:
+                _ml_cache.popitem(last=False)
+    return estimate
+
 
 def calculate_variance(values: List[float]) -> float:
     """Calculate variance percentage between sources."""
@@ -364,8 +504,9 @@ def calculate_variance(values: List[float]) -> float:
     mean = sum(values) / len(values)
     if mean == 0:
         return 0.0
-    
-    max_diff = max(abs(v - mean) for v in values)
+
+    # The largest deviation from the mean is at one of the extremes.
+    max_diff = max(max(values) - mean, mean - min(values))
     return (max_diff / mean) * 100
 
 
@@ -393,13 +534,7 @@ def estimate_rent_v2(
     
     # 1. Check for non-rentable property type
     if is_non_rentable(property_type):
-        return RentEstimate(
-            estimated_rent=0,
-            confidence_score=1.0,
-            method='non_rentable_property_type',
-            property_type=property_type,
-            reason='Property type indicates no rentable structure'
-        )
+        return _non_rentable_estimate(property_type)
     
     # 2. Get HUD SAFMR (Source A)
     hud_rent = None
@@ -408,25 +543,57 @@ def estimate_rent_v2(
     
     # 3. Get Scraped Comps (Source B)
     comps_median, comps, comp_count = get_scraped_comps(
-        lat, lon, bedrooms if bedrooms is not None else 3,
-        radius_miles=50.0,
+        lat, lon, _comps_bedrooms(bedrooms),
+        radius_miles=COMPS_RADIUS_MILES,
         hud_rent=hud_rent
     )
     
     # 4. Get ML Prediction (Source C)
     ml_prediction = None
     if HAS_ML_MODEL:
-        property_data = {
-            'bedrooms': bedrooms,
-            'bathrooms': bathrooms,
-            'sqft': sqft,
-            'year_built': year_built,
-            'latitude': lat,
-            'longitude': lon,
-            'property_type': property_type
-        }
+        property_data = _ml_property_data(lat, lon, bedrooms, bathrooms, sqft,
+                                          year_built, property_type)
         ml_prediction = get_ml_prediction(property_data, hud_rent=hud_rent)
     
+    return _triangulate(hud_rent, comps_median, comps, comp_count,
+                        ml_prediction, property_type)
+
+
+def _comps_bedrooms(bedrooms: Optional[int]) -> int:
+    return bedrooms if bedrooms is not None else 3
+
+
+def _non_rentable_estimate(property_type: Optional[str]) -> RentEstimate:
+    return RentEstimate(
+        estimated_rent=0,
+        confidence_score=1.0,
+        method='non_rentable_property_type',
+        property_type=property_type,
+        reason='Property type indicates no rentable structure'
+    )
+
+
+def _ml_property_data(lat, lon, bedrooms, bathrooms, sqft, year_built, property_type) -> Dict[str, Any]:
+    return {
+        'bedrooms': bedrooms,
+        'bathrooms': bathrooms,
+        'sqft': sqft,
+        'year_built': year_built,
+        'latitude': lat,
+        'longitude': lon,
+        'property_type': property_type
+    }
+
+
+def _triangulate(
+    hud_rent: Optional[float],
+    comps_median: Optional[float],
+    comps: List[Dict],
+    comp_count: int,
+    ml_prediction: Optional[float],
+    property_type: Optional[str],
+) -> RentEstimate:
+    """Weight the available sources into one RentEstimate (steps 5-8)."""
     # 5. Calculate weights based on availability
     weights = {}
     sources = {}
@@ -509,6 +676,149 @@ def estimate_rent_v2(
     )
 
 
+# Records per LATERAL comps query in estimate_rent_v2_batch. Each 50-mile box
+# can hold thousands of rentals, so the candidate rows of a whole batch must
+# never be materialized at once; a chunk's rows are scored and dropped before
+# the next chunk is fetched.
+COMPS_BATCH_CHUNK = 100
+
+
+def estimate_rent_v2_batch(records: List[Dict[str, Any]]) -> List[RentEstimate]:
+    """estimate_rent_v2 over many properties with shared DB prework.
+
+    Each record takes the same keys as estimate_rent_v2's arguments (lat, lon,
+    bedrooms, bathrooms, sqft, zip_code, property_type, year_built). Results
+    come back in input order and match what estimate_rent_v2 returns per
+    record.
+
+    Looping estimate_rent_v2 costs two pool checkouts and two queries per
+    property, and most of the HUD lookups repeat (a crawl batch is a handful
+    of ZIPs). Here HUD is ONE query over the distinct ZIPs and comps are one
+    query per COMPS_BATCH_CHUNK records that unnests their bounding boxes and
+    joins LATERAL.
+    """
+    results: List[Optional[RentEstimate]] = [None] * len(records)
+    pending = []
+    for i, r in enumerate(records):
+        if is_non_rentable(r.get('property_type')):
+            results[i] = _non_rentable_estimate(r.get('property_type'))
+        else:
+            pending.append(i)
+    if not pending:
+        return results
+
+    hud_by_key = _batch_hud(records, pending)
+    for start in range(0, len(pending), COMPS_BATCH_CHUNK):
+        chunk = pending[start:start + COMPS_BATCH_CHUNK]
+        candidates_by_idx = _batch_comps(records, chunk)
+        for i in chunk:
+            r = records[i]
+            lat, lon, bedrooms = r['lat'], r['lon'], r.get('bedrooms')
+
+            hud_rent = None
+            if r.get('zip_code') and bedrooms:
+                key = (_clean_zip(r['zip_code']), min(max(int(bedrooms), 0), 4))
+                hud_rent = hud_by_key.get(key)
+
+            comps_median, comps, comp_count = _select_comps(
+                lat, lon, _comps_bedrooms(bedrooms), candidates_by_idx[i],
+                COMPS_RADIUS_MILES, 15, hud_rent
+            )
+
+            ml_prediction = None
+            if HAS_ML_MODEL:
+                property_data = _ml_property_data(lat, lon, bedrooms, r.get('bathrooms'),
+                                                  r.get('sqft'), r.get('year_built'),
+                                                  r.get('property_type'))
+                ml_prediction = get_ml_prediction(property_data, hud_rent=hud_rent)
+
+            results[i] = _triangulate(hud_rent, comps_median, comps, comp_count,
+                                      ml_prediction, r.get('property_type'))
+
+    return results
+
+
+def _batch_hud(records: List[Dict[str, Any]], idxs: List[int]) -> Dict[Tuple[str, int], float]:
+    """Latest-FY SAFMR per (zip, clamped bedrooms) — the same row
+    get_hud_safmr picks — for every ZIP among records[idxs], in one query."""
+    zips = sorted({_clean_zip(records[i]['zip_code']) for i in idxs
+                   if records[i].get('zip_code') and records[i].get('bedrooms')})
+    hud_by_key: Dict[Tuple[str, int], float] = {}
+    if not zips:
+        return hud_by_key
+    conn = get_db_connection()
+    if not conn:
+        return hud_by_key
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT DISTINCT ON (zip_code, bedrooms) zip_code, bedrooms, safmr
+            FROM hud_safmr
+            WHERE zip_code = ANY(%s)
+            ORDER BY zip_code, bedrooms, fy DESC
+            """,
+            (zips,),
+        )
+        for zip_code, beds, safmr in cur.fetchall():
+            if safmr is not None:
+                hud_by_key[(zip_code, int(beds))] = float(safmr)
+    except Exception:
+        log.exception("Error fetching batch HUD SAFMR")
+    finally:
+        release_db_connection(conn)
+    return hud_by_key
+
+
+def _batch_comps(records: List[Dict[str, Any]], idxs: List[int]) -> Dict[int, List[Tuple]]:
+    """Comp candidate rows for each of records[idxs], keyed by index.
+
+    One bounding box per record, probed LATERAL so each box still uses
+    idx_rental_geo exactly as the single-record query in get_scraped_comps does.
+    """
+    candidates_by_idx: Dict[int, List[Tuple]] = {i: [] for i in idxs}
+    conn = get_db_connection()
+    if not conn:
+        return candidates_by_idx
+    try:
+        cur = conn.cursor()
+        boxes = [_comp_box(records[i]['lat'], records[i]['lon'], COMPS_RADIUS_MILES)
+                 for i in idxs]
+        beds = [_comps_bedrooms(records[i].get('bedrooms')) for i in idxs]
+        cur.execute(
+            """
+            SELECT q.idx, c.address, c.price, c.bedrooms, c.bathrooms, c.sqft,
+                   c.latitude, c.longitude
+            FROM unnest(%s::int[], %s::float8[], %s::float8[], %s::float8[],
+                        %s::float8[], %s::int[])
+                 AS q(idx, lat_lo, lat_hi, lon_lo, lon_hi, beds)
+            JOIN LATERAL (
+                SELECT address, price, bedrooms, bathrooms, sqft, latitude, longitude
+                FROM rental_listings
+                WHERE latitude IS NOT NULL
+                  AND longitude IS NOT NULL
+                  AND latitude BETWEEN q.lat_lo AND q.lat_hi
+                  AND longitude BETWEEN q.lon_lo AND q.lon_hi
+                  AND price > 0
+                  AND price < 10000
+                  AND bedrooms BETWEEN GREATEST(q.beds - 1, 0) AND q.beds + 1
+                  AND created_at > NOW() - make_interval(days => %s)
+            ) c ON true
+            """,
+            (list(idxs),
+             [b[0] for b in boxes], [b[1] for b in boxes],
+             [b[2] for b in boxes], [b[3] for b in boxes],
+             beds, 90),
+        )
+        for row in cur.fetchall():
+            candidates_by_idx[row[0]].append(row[1:])
+    except Exception:
+        log.exception("Error fetching batch comps")
+    finally:
+        release_db_connection(conn)
+    return candidates_by_idx
+
+
 # CLI interface for testing
 if __name__ == "__main__":
     import argparse
@@ -523,6 +833,7 @@ if __name__ == "__main__":
     parser.add_argument("--property-type", type=str)
     
     args = parser.parse_args()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
     
     result = estimate_rent_v2(
         lat=args.lat,
@@ -1,8 +1,16 @@
+"""Market-target scheduler: runs scraper.py for every due row in market_targets.
+
+Talks to Postgres directly through psycopg2. There is deliberately no
+Supabase client on this path -- the scheduler image only needs
+services/requirements.txt, and pulling in the supabase SDK (httpx, gotrue,
+postgrest, storage3) would cost startup time and RSS for nothing.
+"""
 import os
 import time
 import sys
 import subprocess
-import json
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 import psycopg2
 from dotenv import load_dotenv
@@ -21,6 +29,10 @@ if not DATABASE_URL:
     DB_NAME = os.getenv("DB_NAME", "postgres")
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Hard ceiling on one scraper subprocess. The scraper is killed past it so a
+# hang cannot stall every target queued behind it.
+SCRAPER_TIMEOUT_S = int(os.getenv("SCRAPER_TIMEOUT_S", "1800"))
+
 def get_db_connection():
     try:
         return psycopg2.connect(DATABASE_URL)
@@ -104,11 +116,41 @@ def run_scraper_for_target(target):
         cmd[1] = "scraper.py"
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
+        # Stream the scraper's stderr instead of capture_output: capturing
+        # buffered the whole run's log in this process until exit, so a long
+        # verbose scrape grew the scheduler's RSS without bound. Only the tail
+        # is kept for the failure message. stdout (the JSON summary) is unused.
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        # A hung scraper used to freeze the whole scheduler. The timer kills
+        # it, which closes the pipe and ends the read loop below.
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(SCRAPER_TIMEOUT_S, _kill)
+        watchdog.start()
+        tail = deque(maxlen=20)
+        try:
+            for line in proc.stderr:
+                line = line.rstrip()
+                tail.append(line)
+                print(f"  [scraper] {line}")
+            returncode = proc.wait()
+        finally:
+            watchdog.cancel()
+
         # Check output for errors
-        if result.returncode != 0:
-            print(f"Scraper failed for {location}: {result.stderr}")
+        if returncode != 0:
+            reason = f"killed after {SCRAPER_TIMEOUT_S}s" if timed_out.is_set() else f"exit {returncode}"
+            print(f"Scraper failed for {location} ({reason}): " + " | ".join(tail))
             return
 
         print(f"Scraper finished for {location}.")
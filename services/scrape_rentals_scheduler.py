@@ -5,17 +5,23 @@ Runs daily to build up the rental_listings dataset for ML training.
 Uses HomeHarvest (free) to scrape from Realtor.com.
 """
 
+import asyncio
+import atexit
 import os
 import sys
 import time
 import json
+import threading
 import psycopg2
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from fetch_rental_comps import fetch_rentals
+import _scrape_state
 
 # Load environment
 env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../.env.local')
@@ -32,14 +38,120 @@ if not DATABASE_URL:
     DB_NAME = os.getenv("DB_NAME", "postgres")
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Markets scraped in parallel per cycle. Kept low on purpose: every market is
+# a burst of Realtor.com requests from the same IP.
+SCRAPE_CONCURRENCY = max(1, int(os.getenv("SCRAPE_CONCURRENCY", "3")))
+
+# HomeHarvest scrapes Realtor.com for every market.
+SCRAPE_HOST = "realtor.com"
+
+
+class AdaptiveLimiter:
+    """
+    AIMD pacing for one host: a minimum spacing between request starts,
+    shared by every worker hitting that host.
+
+    Each success shaves `step` seconds off the spacing (additive increase of
+    the rate); each failure doubles it (multiplicative decrease), bounded by
+    [min_interval, max_interval]. This replaces fixed sleeps after every
+    market: a healthy source is paced near min_interval, a throttling one
+    backs off quickly.
+    """
+
+    def __init__(self, interval: float = 3.0, min_interval: float = 1.0,
+                 max_interval: float = 120.0, step: float = 0.5):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.step = step
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = time.monotonic() + self.interval
+
+    def success(self):
+        self.interval = max(self.min_interval, self.interval - self.step)
+
+    def failure(self):
+        self.interval = min(self.max_interval, self.interval * 2)
+        # Push out the next start too, so queued workers feel the backoff now.
+        self._next_start = max(self._next_start, time.monotonic() + self.interval)
+
+
+def _limiter_for(limiters: dict, host: str) -> AdaptiveLimiter:
+    if host not in limiters:
+        limiters[host] = AdaptiveLimiter(
+            interval=float(os.getenv("SCRAPE_INTERVAL_S", "3")),
+            min_interval=float(os.getenv("SCRAPE_MIN_INTERVAL_S", "1")),
+        )
+    return limiters[host]
+
+# One pool for the whole process. The cycle fans out over worker threads,
+# so it has to be the thread-safe variant; created lazily so importing this
+# module never touches the network.
+_connection_pool = None
+_pool_lock = threading.Lock()
+
+def get_db_pool():
+    global _connection_pool
+    if _connection_pool is None:
+        with _pool_lock:
+            if _connection_pool is None:
+                try:
+                    _connection_pool = ThreadedConnectionPool(
+                        minconn=1,
+                        maxconn=8,
+                        dsn=DATABASE_URL
+                    )
+                    atexit.register(_connection_pool.closeall)
+                except Exception as e:
+                    print(f"Error creating connection pool: {e}", file=sys.stderr)
+    return _connection_pool
+
 def get_db_connection():
+    """Get a connection from the pool, or a direct one if the pool is exhausted."""
+    pool = get_db_pool()
+    if pool:
+        try:
+            return pool.getconn()
+        except Exception as e:
+            print(f"Error getting connection from pool: {e}", file=sys.stderr)
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
+        return psycopg2.connect(DATABASE_URL)
     except Exception as e:
         print(f"Error connecting to database: {e}", file=sys.stderr)
         return None
 
+def release_db_connection(conn):
+    """Return a connection to the pool, or close it if it didn't come from there."""
+    if not conn:
+        return
+    pool = get_db_pool()
+    if pool:
+        try:
+            pool.putconn(conn)
+            return
+        except Exception:
+            pass
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+@contextmanager
+def db_conn():
+    """Yield a connection (or None if the DB is unreachable) and always release it."""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
+
 # Default markets to scrape for ML training data
 # These are high-volume rental markets with good data availability
 DEFAULT_MARKETS = [
@@ -80,59 +192,72 @@ DEFAULT_MARKETS = [
 
 def get_active_markets():
     """Fetch markets from market_targets table if available."""
-    conn = get_db_connection()
-    if not conn:
-        return DEFAULT_MARKETS
+    with db_conn() as conn:
+        if not conn:
+            return DEFAULT_MARKETS
 
-    try:
-        cursor = conn.cursor()
-        # Check if table exists
-        cursor.execute("SELECT to_regclass('public.market_targets');")
-        if cursor.fetchone()[0]:
-            cursor.execute("SELECT location FROM market_targets WHERE is_active = TRUE;")
-            rows = cursor.fetchall()
-            if rows:
-                return [row[0] for row in rows]
-    except Exception as e:
-        print(f"Warning: Could not fetch market_targets: {e}")
-    finally:
-        if conn: conn.close()
+        try:
+            cursor = conn.cursor()
+            # Check if table exists
+            cursor.execute("SELECT to_regclass('public.market_targets');")
+            if cursor.fetchone()[0]:
+                cursor.execute("SELECT location FROM market_targets WHERE is_active = TRUE;")
+                rows = cursor.fetchall()
+                if rows:
+                    return [row[0] for row in rows]
+        except Exception as e:
+            print(f"Warning: Could not fetch market_targets: {e}")
     
     return DEFAULT_MARKETS
 
 
-def get_last_scrape_time(location: str) -> datetime | None:
-    """Check when we last scraped rentals for a location."""
-    conn = get_db_connection()
-    if not conn:
-        return None
+def _fetch_market(location: str, past_days: int) -> int:
+    """fetch_rentals on a pooled connection (runs in a worker thread).
 
-    try:
-        cursor = conn.cursor()
-        city = location.split(',')[0].strip()
-        query = """
-            SELECT created_at FROM rental_listings 
-            WHERE city ILIKE %s
-            ORDER BY created_at DESC LIMIT 1
-        """
-        cursor.execute(query, (f"%{city}%",))
-        result = cursor.fetchone()
-        
-        if result:
-            return result[0]
-    except Exception as e:
-        print(f"Warning: Could not check last scrape time for {location}: {e}")
-    finally:
-        if conn: conn.close()
-    
-    return None
+    Returns the rows written; raises if the market's rows did not land.
+    """
+    with db_conn() as conn:
+        return fetch_rentals(location, past_days=past_days, conn=conn)
 
 
-def should_scrape(location: str, min_hours: int = 20) -> bool:
-    """Determine if we should scrape this location (avoid too frequent scrapes)."""
-    last_scrape = get_last_scrape_time(location)
+def _city(location: str) -> str:
+    """'Cleveland, OH' -> 'Cleveland' (rental_listings.city has no state)."""
+    return location.split(',')[0].strip()
+
+
+def get_last_scrape_times(cities: list[str]) -> dict[str, datetime]:
+    """
+    Most recent rental_listings.created_at per city, in one round-trip.
+
+    Cities with no rows are simply absent from the result. An equality match
+    on city groups cleanly (and can use an index); the old per-market
+    ILIKE '%city%' could not, and cost one query per market.
+    """
+    if not cities:
+        return {}
+
+    with db_conn() as conn:
+        if not conn:
+            return {}
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT city, MAX(created_at) FROM rental_listings
+                WHERE city = ANY(%s)
+                GROUP BY city
+            """, (list(cities),))
+            return {city: last for city, last in cursor.fetchall()}
+        except Exception as e:
+            print(f"Warning: Could not check last scrape times: {e}")
+
+    return {}
+
+
+def _fresh_enough(last_scrape: datetime | None, min_hours: int = 20) -> bool:
+    """True if last_scrape is less than min_hours old (i.e. skip this market)."""
     if last_scrape is None:
-        return True
+        return False
     
     # Ensure timezone awareness compatibility
     if last_scrape.tzinfo is None:
@@ -140,21 +265,46 @@ def should_scrape(location: str, min_hours: int = 20) -> bool:
         last_scrape = last_scrape.replace(tzinfo=datetime.now().astimezone().tzinfo)
 
     hours_since = (datetime.now(last_scrape.tzinfo) - last_scrape).total_seconds() / 3600
-    return hours_since >= min_hours
+    return hours_since < min_hours
 
 
-def run_rental_scrape_cycle(past_days: int = 14):
+def last_scrape_map(cities: list[str]) -> dict[str, datetime]:
     """
-    Main scraping cycle. Iterates through all markets and collects rental data.
+    Last scrape per city from the local state file; Postgres is only asked
+    about cities the state file has never recorded.
+    """
+    known = _scrape_state.load()
+    result = {c: known[c] for c in cities if c in known}
+    missing = [c for c in cities if c not in known]
+    if missing:
+        result.update(get_last_scrape_times(missing))
+    return result
+
+
+def should_scrape(location: str, min_hours: int = 20) -> bool:
+    """Determine if we should scrape this location (avoid too frequent scrapes)."""
+    city = _city(location)
+    return not _fresh_enough(last_scrape_map([city]).get(city), min_hours)
+
+
+async def run_rental_scrape_cycle(past_days: int = 14):
+    """
+    Main scraping cycle. Scrapes all markets concurrently and collects rental data.
+    
+    fetch_rentals is blocking (HomeHarvest + psycopg2), so each market runs in
+    a worker thread. SCRAPE_CONCURRENCY caps how many hit Realtor.com at once,
+    and a per-host AdaptiveLimiter spaces out request starts, backing off on
+    errors: bursts of parallel requests are what gets the scraper IP blocked.
     
     Args:
         past_days: How far back to look for listings (default 14 days for freshness)
     """
     markets = get_active_markets()
+    last_scrapes = last_scrape_map(sorted({_city(m) for m in markets}))
     print(f"\n{'='*60}")
     print(f"RENTAL SCRAPE CYCLE - {datetime.now().isoformat()}")
     print(f"{'='*60}")
-    print(f"Markets to process: {len(markets)}")
+    print(f"Markets to process: {len(markets)} (concurrency {SCRAPE_CONCURRENCY})")
     
     stats = {
         "total_markets": len(markets),
@@ -163,40 +313,47 @@ def run_rental_scrape_cycle(past_days: int = 14):
         "failed": 0,
         "total_listings": 0
     }
-    
-    for i, location in enumerate(markets, 1):
-        print(f"\n[{i}/{len(markets)}] Processing: {location}")
-        
+    sem = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    limiters: dict[str, AdaptiveLimiter] = {}
+
+    async def worker(i: int, location: str):
         # Check if we should scrape
-        if not should_scrape(location):
-            print(f"  ⏭️  Skipped (recently scraped)")
+        if _fresh_enough(last_scrapes.get(_city(location)), 20):
+            print(f"[{i}/{len(markets)}] ⏭️  Skipped {location} (recently scraped)")
             stats["skipped"] += 1
-            continue
-        
-        try:
-            # Call the existing fetch_rentals function
-            fetch_rentals(location, past_days=past_days)
-            stats["scraped"] += 1
-            
+            return
+
+        limiter = _limiter_for(limiters, SCRAPE_HOST)
+        async with sem:
             # Rate limiting to be respectful to the data source
-            time.sleep(3)
-            
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            stats["failed"] += 1
-            time.sleep(5)  # Longer wait after error
+            await limiter.wait()
+            print(f"\n[{i}/{len(markets)}] Processing: {location}")
+            try:
+                # fetch_rentals raises unless its rows were written, so a
+                # market is only remembered as scraped after a real write;
+                # during a DB outage it stays due and is retried next cycle.
+                await asyncio.to_thread(_fetch_market, location, past_days)
+                _scrape_state.mark(_city(location))
+                stats["scraped"] += 1
+                limiter.success()
+                
+            except Exception as e:
+                print(f"  ❌ Error ({location}): {e}")
+                stats["failed"] += 1
+                limiter.failure()
+                print(f"  ↳ backing off {SCRAPE_HOST}: {limiter.interval:.1f}s between markets")
+
+    await asyncio.gather(*(worker(i, loc) for i, loc in enumerate(markets, 1)))
     
     # Get final count
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM rental_listings")
-            stats["total_listings"] = cursor.fetchone()[0]
-        except:
-            pass
-        finally:
-            conn.close()
+    with db_conn() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM rental_listings")
+                stats["total_listings"] = cursor.fetchone()[0]
+            except:
+                pass
     
     print(f"\n{'='*60}")
     print("SCRAPE CYCLE COMPLETE")
@@ -215,7 +372,7 @@ def run_continuous(interval_hours: int = 24):
     
     while True:
         try:
-            run_rental_scrape_cycle()
+            asyncio.run(run_rental_scrape_cycle())
         except Exception as e:
             print(f"Cycle failed: {e}")
         
@@ -234,6 +391,6 @@ if __name__ == "__main__":
     args = parser.parse_args()
     
     if args.once:
-        run_rental_scrape_cycle(past_days=args.past_days)
+        asyncio.run(run_rental_scrape_cycle(past_days=args.past_days))
     else:
         run_continuous(interval_hours=args.interval)
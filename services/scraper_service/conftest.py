@@ -11,9 +11,20 @@ sys.modules.setdefault("homeharvest", hh_stub)
 psycopg2_stub = types.ModuleType("psycopg2")
 psycopg2_stub.connect = lambda *a, **kw: None
 extras_stub = types.ModuleType("psycopg2.extras")
-extras_stub.Json = lambda x: x
+extras_stub.Json = lambda x, dumps=None: x
+extras_stub.execute_values = lambda *a, **kw: None
+pool_stub = types.ModuleType("psycopg2.pool")
+
+
+class _NoPool:
+    def __init__(self, *a, **kw):
+        raise RuntimeError("no database in unit tests")
+
+
+pool_stub.ThreadedConnectionPool = _NoPool
 sys.modules.setdefault("psycopg2", psycopg2_stub)
 sys.modules.setdefault("psycopg2.extras", extras_stub)
+sys.modules.setdefault("psycopg2.pool", pool_stub)
 
 # Stub dotenv
 dotenv_stub = types.ModuleType("dotenv")
@@ -1,17 +1,30 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Union, List
+from collections import OrderedDict
 from homeharvest import scrape_property
 import pandas as pd
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+import asyncio
+import atexit
 import os
+import io
+import math
+import queue
+import threading
+import uuid
 import datetime as dt
 import urllib.parse
 import requests
+from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from time import sleep
 from enrichment import extract_enrichment, _num, _date
+from scrape_common import (
+    CENSUS_BENCHMARK, GeocodeCache, Throttle, census_batch, dumps, format_addresses, geocode_key,
+    image_lists, jsonify_df, loads, records,
+)
 
 app = FastAPI()
 
@@ -27,8 +40,6 @@ if not DATABASE_URL:
 
 DEFAULT_USER_ID = os.getenv("DEFAULT_USER_ID")
 
-CENSUS_BENCHMARK = 'Public_AR_Current'
-
 # Cap on how many addresses one scrape will push through the Nominatim fallback.
 # Census runs first in parallel and is cheap; Nominatim is sequential at ~1.1 s
 # each. Measured over 6 h (2026-07-30): batches of 1-5 addresses resolve 30%,
@@ -39,22 +50,93 @@ CENSUS_BENCHMARK = 'Public_AR_Current'
 # are filled when the source later supplies them or a later sweep resolves them.
 MAX_NOMINATIM_FALLBACK = int(os.getenv("MAX_NOMINATIM_FALLBACK", "15"))
 
+# One keep-alive session for every geocoder call: a bare requests.get pays a
+# fresh TCP+TLS handshake per address. pool_maxsize covers the 10 Census
+# worker threads. Idempotent GETs retry transient 429/5xx with a short backoff;
+# the batch POST is not retried here (batch_geocode falls back instead).
+_http = requests.Session()
+_http.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+))
+
+# One pool per worker process, shared by every scrape thread (the /scrape
+# executor and the job workers), so a scrape no longer pays a TCP+auth
+# handshake for each of its connections. Created lazily so importing this
+# module never touches the network. Past DB_POOL_MAX, callers fall back to a
+# direct connection that release_db_connection closes.
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "8"))
+_connection_pool = None
+_pool_lock = threading.Lock()
+
+def get_db_pool():
+    global _connection_pool
+    if _connection_pool is None:
+        with _pool_lock:
+            if _connection_pool is None:
+                try:
+                    _connection_pool = ThreadedConnectionPool(minconn=1, maxconn=DB_POOL_MAX, dsn=DATABASE_URL)
+                    atexit.register(_connection_pool.closeall)
+                except Exception as e:
+                    print(f"DB Pool Error: {e}")
+    return _connection_pool
+
 def get_db_connection():
+    """Get a pooled connection (a direct one if the pool is exhausted), or None."""
+    pool = get_db_pool()
+    if pool:
+        try:
+            conn = pool.getconn()
+            if not conn.closed:
+                return conn
+            pool.putconn(conn, close=True)
+        except Exception as e:
+            print(f"DB Pool Error: {e}")
     try:
         return psycopg2.connect(DATABASE_URL)
     except Exception as e:
         print(f"DB Connect Error: {e}")
         return None
 
+def release_db_connection(conn):
+    """Return a connection to the pool (rolled back by putconn if a
+    transaction was left open), or close it if it didn't come from there."""
+    if not conn:
+        return
+    pool = get_db_pool()
+    if pool:
+        try:
+            pool.putconn(conn, close=bool(conn.closed))
+            return
+        except Exception:
+            pass
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+# Per-host limits for the whole worker process, not per request: sync
+# endpoints run on a threadpool, so two concurrent /scrape calls used to run
+# two Nominatim loops (and 2x10 Census threads) side by side. Nominatim's
+# usage policy is 1 req/sec; Census publishes no limit, so it only gets an
+# in-flight cap sized to the session pool. A 429 from either is retried by
+# the session's Retry, which honours Retry-After.
+NOMINATIM_INTERVAL_S = 1.1
+CENSUS_MAX_INFLIGHT = 10
+_nominatim_throttle = Throttle(NOMINATIM_INTERVAL_S)
+_census_slots = threading.BoundedSemaphore(CENSUS_MAX_INFLIGHT)
+
 def geocode_address_census(address):
     if not address:
         return None
     try:
         encoded = urllib.parse.quote(address)
         url = f"https://geocoding.geo.census.gov/geocoder/locations/onelineaddress?address={encoded}&benchmark={CENSUS_BENCHMARK}&format=json"
-        resp = requests.get(url, timeout=5)
+        with _census_slots:
+            resp = _http.get(url, timeout=5)
         if resp.status_code == 200:
-            data = resp.json()
+            data = loads(resp.content)
             matches = data.get('result', {}).get('addressMatches', [])
             if matches:
                 c = matches[0]['coordinates']
@@ -63,15 +145,28 @@ def geocode_address_census(address):
         print(f"Census geocode error: {e}")
     return None
 
+# A Census batch call has a few seconds of fixed cost, so lookups smaller
+# than CENSUS_BATCH_MIN stay on the parallel per-address path.
+CENSUS_BATCH_MIN = int(os.getenv("CENSUS_BATCH_MIN", "20"))
+
+def geocode_census_batch(address_list):
+    """Resolve (index, address) pairs through the Census batch endpoint.
+
+    Returns dict index -> (lat, lon) for the matches. Raises if a batch
+    request itself fails, so the caller can fall back to per-address lookups.
+    """
+    return census_batch(_http, address_list)
+
 def geocode_address_nominatim(address):
     if not address:
         return None
     try:
         encoded = urllib.parse.quote(address)
         url = f"https://nominatim.openstreetmap.org/search?q={encoded}&format=json&limit=1"
-        resp = requests.get(url, headers={'User-Agent': 'OnePercentRealEstate/1.0'}, timeout=5)
+        _nominatim_throttle.wait()
+        resp = _http.get(url, headers={'User-Agent': 'OnePercentRealEstate/1.0'}, timeout=5)
         if resp.status_code == 200:
-            data = resp.json()
+            data = loads(resp.content)
             if data:
                 return (float(data[0]['lat']), float(data[0]['lon']))
     except Exception as e:
@@ -101,24 +196,66 @@ def usable_coords(lat, lon):
     return (lat_f, lon_f)
 
 
+# Geocode cache (see scrape_common.GeocodeCache), on the pooled connections.
+_geocode_cache = GeocodeCache(
+    connect=lambda: get_db_connection(),
+    release=lambda conn: release_db_connection(conn),
+    on_error=print,
+)
+
+
+def geocode_cache_get(addresses) -> dict:
+    """Known results for addresses: address -> (lat, lon), or None for a
+    recent miss. Addresses absent from the result need a live lookup."""
+    return _geocode_cache.get(addresses)
+
+
+def geocode_cache_put(hits, misses) -> None:
+    """Record live lookups. hits: (address, (lat, lon), provider); misses: addresses."""
+    _geocode_cache.put(hits, misses)
+
+
 def batch_geocode(address_list):
-    """Batch geocode: Census (parallel) then Nominatim fallback (sequential, 1 req/sec).
+    """Batch geocode: geocode cache, then Census (batch endpoint, or parallel
+    for small lists), then Nominatim fallback (sequential, 1 req/sec).
     
     address_list: list of (index, address_string) tuples
     Returns: dict index -> (lat, lon)
     """
-    results = {}
-    fallback_list = []
-
-    with ThreadPoolExecutor(max_workers=10) as pool:
-        fut_map = {pool.submit(geocode_address_census, addr): idx for idx, addr in address_list}
-        for fut in as_completed(fut_map):
-            idx = fut_map[fut]
-            coords = fut.result()
-            if coords:
-                results[idx] = coords
-            else:
-                fallback_list.append((idx, dict(address_list)[idx]))
+    cached = geocode_cache_get({addr for _, addr in address_list})
+    results = {idx: cached[addr] for idx, addr in address_list if cached.get(addr)}
+    pending = [(idx, addr) for idx, addr in address_list if addr not in cached]
+    if cached:
+        print(f"Geocode: {len(address_list) - len(pending)}/{len(address_list)} from cache "
+              f"({len(results)} resolved)")
+    if not pending:
+        return results
+
+    # One live lookup per distinct address: repeats in the scrape (and case
+    # variants, which share a cache key) take the first row's result.
+    same_key = {}
+    for idx, addr in pending:
+        same_key.setdefault(geocode_key(addr), []).append(idx)
+    pending = [(idx, addr) for idx, addr in pending if same_key[geocode_key(addr)][0] == idx]
+
+    census = None
+    if len(pending) >= CENSUS_BATCH_MIN:
+        try:
+            census = geocode_census_batch(pending)
+        except Exception as e:
+            print(f"Census batch geocode error: {e}; falling back to per-address lookups")
+
+    if census is None:
+        census = {}
+        with ThreadPoolExecutor(max_workers=CENSUS_MAX_INFLIGHT) as pool:
+            fut_map = {pool.submit(geocode_address_census, addr): idx for idx, addr in pending}
+            for fut in as_completed(fut_map):
+                coords = fut.result()
+                if coords:
+                    census[fut_map[fut]] = coords
+    results.update(census)
+
+    fallback_list = [(idx, addr) for idx, addr in pending if idx not in census]
 
     # The Nominatim fallback is the expensive path: sequential, ~1.1 s per
     # address. It was invisible in the logs, which is why several hundred
@@ -134,22 +271,32 @@ def batch_geocode(address_list):
         fallback_list = fallback_list[:MAX_NOMINATIM_FALLBACK]
 
     if fallback_list or skipped:
-        print(f"Geocode: {len(results)} via Census, "
+        print(f"Geocode: {len(census)} via Census, "
               f"{len(fallback_list)} to Nominatim fallback "
               f"(sequential, ~{len(fallback_list) * 1.1:.0f}s)"
               f"{f', {skipped} skipped over cap' if skipped else ''}")
 
+    hits = [(addr, census[idx], "census") for idx, addr in pending if idx in census]
+    misses = []
     nominatim_ok = 0
     for idx, addr in fallback_list:
         coords = geocode_address_nominatim(addr)
         if coords:
             results[idx] = coords
+            hits.append((addr, coords, "nominatim"))
             nominatim_ok += 1
-        sleep(1.1)
+        else:
+            # Only a real double miss is cached; rows skipped over the cap
+            # were never asked and stay eligible next time.
+            misses.append(addr)
 
     if fallback_list:
         print(f"Geocode: Nominatim resolved {nominatim_ok}/{len(fallback_list)}")
 
+    geocode_cache_put(hits, misses)
+    for first, *rest in same_key.values():
+        if first in results:
+            results.update(dict.fromkeys(rest, results[first]))
     return results
 
 def get_property_type(row):
@@ -266,7 +413,7 @@ _RESURRECT_SQL_CACHE: str | None = None
 
 
 def _resurrect_sql(cursor) -> str:
-    """Move any archived rows for this address back into `listings`.
+    """Move any archived rows for the staged addresses back into `listings`.
 
     Columns are enumerated explicitly and GENERATED columns excluded. `SELECT *`
     looks equivalent and is not: `listings.rent_price_ratio` is GENERATED ALWAYS,
@@ -290,7 +437,8 @@ def _resurrect_sql(cursor) -> str:
         _RESURRECT_SQL_CACHE = f"""
             WITH resurrected AS (
               DELETE FROM listings_archive
-               WHERE address = %s AND listing_type = %s
+               WHERE (address, listing_type) IN
+                     (SELECT address, listing_type FROM _scrape_listings)
               RETURNING {cols}
             )
             INSERT INTO listings ({cols}) SELECT {cols} FROM resurrected
@@ -299,7 +447,253 @@ def _resurrect_sql(cursor) -> str:
     return _RESURRECT_SQL_CACHE
 
 
-@app.post("/scrape")
+# Bulk load: every scraped row is COPYed into a per-transaction staging table,
+# then one INSERT ... SELECT per target table does the merge. That replaces a
+# round-trip (and a parse/plan) per listing with three statements per scrape,
+# and the whole scrape commits once.
+#
+# Staging columns are deliberately loose (NUMERIC rather than INTEGER, etc.):
+# COPY's text input is stricter than psycopg2's literals were ('1800.0' is not
+# a valid INTEGER), while the INSERT ... SELECT applies the same assignment
+# casts the per-row INSERTs always relied on.
+_STAGE_LISTINGS_COLS = (
+    "ord", "address", "city", "state", "zip_code", "price", "bedrooms", "bathrooms",
+    "sqft", "year_built", "property_type", "listing_type", "images", "raw_data",
+    "latitude", "longitude",
+    "county", "fips_code", "neighborhoods", "last_sold_price", "last_sold_date",
+    "assessed_value", "estimated_value", "description", "style", "new_construction",
+    "list_date", "price_per_sqft", "hoa_fee", "tax_annual_amount", "property_url",
+    "parking_garage", "lot_sqft", "stories", "nearby_schools", "agent_info", "tax_history",
+)
+_STAGE_LISTINGS_DDL = """
+    CREATE TEMP TABLE _scrape_listings (
+        ord int, address text, city text, state text, zip_code text,
+        price numeric, bedrooms numeric, bathrooms numeric, sqft numeric, year_built numeric,
+        property_type text, listing_type text, images jsonb, raw_data jsonb,
+        latitude numeric, longitude numeric,
+        county text, fips_code text, neighborhoods text, last_sold_price numeric, last_sold_date date,
+        assessed_value numeric, estimated_value numeric, description text, style text, new_construction boolean,
+        list_date date, price_per_sqft numeric, hoa_fee numeric, tax_annual_amount numeric, property_url text,
+        parking_garage boolean, lot_sqft numeric, stories numeric, nearby_schools jsonb, agent_info jsonb, tax_history jsonb
+    ) ON COMMIT DROP
+"""
+
+_STAGE_RENTALS_COLS = (
+    "ord", "address", "city", "state", "zip_code", "price", "bedrooms", "bathrooms",
+    "sqft", "property_type", "latitude", "longitude", "raw_data",
+)
+_STAGE_RENTALS_DDL = """
+    CREATE TEMP TABLE _scrape_rentals (
+        ord int, address text, city text, state text, zip_code text,
+        price numeric, bedrooms numeric, bathrooms numeric, sqft numeric,
+        property_type text, latitude numeric, longitude numeric, raw_data jsonb
+    ) ON COMMIT DROP
+"""
+
+_STAGE_SOLD_COLS = (
+    "ord", "address", "city", "state", "zip_code", "sold_price", "sold_date", "list_price",
+    "bedrooms", "bathrooms", "sqft", "year_built", "lot_sqft", "property_type",
+    "latitude", "longitude", "raw_data",
+)
+_STAGE_SOLD_DDL = """
+    CREATE TEMP TABLE _scrape_sold (
+        ord int, address text, city text, state text, zip_code text,
+        sold_price numeric, sold_date date, list_price numeric,
+        bedrooms numeric, bathrooms numeric, sqft numeric, year_built numeric, lot_sqft numeric,
+        property_type text, latitude numeric, longitude numeric, raw_data jsonb
+    ) ON COMMIT DROP
+"""
+
+# Same-day re-scrapes of an address are skipped, as before (the existence
+# check ignores source on purpose). DISTINCT ON keeps the first row of any
+# address repeated within the scrape, which the per-row loop also did.
+_INSERT_RENTALS_SQL = """
+    INSERT INTO rental_listings (
+        address, city, state, zip_code, price, bedrooms, bathrooms,
+        sqft, property_type, latitude, longitude, source, raw_data
+    )
+    SELECT DISTINCT ON (s.address)
+           s.address, s.city, s.state, s.zip_code, s.price, s.bedrooms, s.bathrooms,
+           s.sqft, s.property_type, s.latitude, s.longitude, 'homeharvest', s.raw_data
+      FROM _scrape_rentals s
+     WHERE NOT EXISTS (
+           SELECT 1 FROM rental_listings r
+            WHERE r.address = s.address AND r.listing_date = CURRENT_DATE)
+     ORDER BY s.address, s.ord
+    ON CONFLICT DO NOTHING
+"""
+
+_INSERT_SOLD_SQL = """
+    INSERT INTO sold_listings (
+        address, city, state, zip_code,
+        sold_price, sold_date, list_price,
+        bedrooms, bathrooms, sqft, year_built, lot_sqft,
+        property_type, latitude, longitude, source, raw_data
+    )
+    SELECT address, city, state, zip_code,
+           sold_price, sold_date, list_price,
+           bedrooms, bathrooms, sqft, year_built, lot_sqft,
+           property_type, latitude, longitude, 'homeharvest', raw_data
+      FROM _scrape_sold
+     ORDER BY ord
+    ON CONFLICT (address, sold_date) DO NOTHING
+"""
+
+# ON CONFLICT DO UPDATE cannot touch one row twice in a statement, so rows
+# that land on the same (address, listing_type, sale_type) are collapsed to
+# the last one scraped — the row the per-row loop would have left behind.
+# sale_type is only known after classify_sale_type(), hence the subquery.
+_UPSERT_LISTINGS_SQL = """
+    INSERT INTO listings (
+        address, city, state, zip_code, price, bedrooms, bathrooms,
+        sqft, year_built, property_type, listing_type, images, raw_data,
+        latitude, longitude, user_id,
+        sale_type, sale_type_source, sale_type_signal, sale_type_confidence,
+        address_norm, address_hash,
+        county, fips_code, neighborhoods, last_sold_price, last_sold_date,
+        assessed_value, estimated_value, description, style, new_construction,
+        list_date, price_per_sqft, hoa_fee, tax_annual_amount, property_url,
+        parking_garage, lot_sqft,
+        stories, nearby_schools, agent_info, tax_history,
+        last_seen_at
+    )
+    SELECT
+        d.address, d.city, d.state, d.zip_code, d.price, d.bedrooms, d.bathrooms,
+        d.sqft, d.year_built, d.property_type, d.listing_type, d.images, d.raw_data,
+        d.latitude, d.longitude, %(user_id)s,
+        d.sale_type, d.sale_type_source, d.sale_type_signal, d.sale_type_confidence,
+        d.address_norm,
+        md5(coalesce(d.address_norm, '') || '|' || coalesce(lower(d.city), '') || '|' || coalesce(lower(d.state), '')),
+        d.county, d.fips_code, d.neighborhoods, d.last_sold_price, d.last_sold_date,
+        d.assessed_value, d.estimated_value, d.description, d.style, d.new_construction,
+        d.list_date, d.price_per_sqft, d.hoa_fee, d.tax_annual_amount, d.property_url,
+        d.parking_garage, d.lot_sqft,
+        d.stories, d.nearby_schools, d.agent_info, d.tax_history,
+        now()
+    FROM (
+        SELECT DISTINCT ON (s.address, s.listing_type, t.sale_type)
+               s.*, t.sale_type, t.sale_type_source, t.sale_type_signal, t.sale_type_confidence,
+               n.address_norm
+          FROM _scrape_listings s
+         CROSS JOIN LATERAL classify_sale_type(s.raw_data, s.property_type) c
+         CROSS JOIN LATERAL (
+             SELECT CASE WHEN %(foreclosure)s::bool AND c.sale_type = 'standard' THEN 'foreclosure' ELSE c.sale_type END AS sale_type,
+                    CASE WHEN %(foreclosure)s::bool AND c.sale_type = 'standard' THEN 'homeharvest_flag' ELSE c.sale_type_source END AS sale_type_source,
+                    CASE WHEN %(foreclosure)s::bool AND c.sale_type = 'standard' THEN 'homeharvest foreclosure filter' ELSE c.sale_type_signal END AS sale_type_signal,
+                    CASE WHEN %(foreclosure)s::bool AND c.sale_type = 'standard' THEN 0.95 ELSE c.sale_type_confidence END AS sale_type_confidence
+         ) t
+         CROSS JOIN LATERAL (
+             SELECT NULLIF(regexp_replace(regexp_replace(lower(trim(s.address)), '[.,#]', '', 'g'), '\\s+', ' ', 'g'), '') AS address_norm
+         ) n
+         ORDER BY s.address, s.listing_type, t.sale_type, s.ord DESC
+    ) d
+    ON CONFLICT (address, listing_type, sale_type)
+    DO UPDATE SET
+        price = EXCLUDED.price,
+        bedrooms = COALESCE(EXCLUDED.bedrooms, listings.bedrooms),
+        bathrooms = COALESCE(EXCLUDED.bathrooms, listings.bathrooms),
+        sqft = COALESCE(EXCLUDED.sqft, listings.sqft),
+        year_built = COALESCE(EXCLUDED.year_built, listings.year_built),
+        property_type = COALESCE(EXCLUDED.property_type, listings.property_type),
+        images = EXCLUDED.images,
+        raw_data = EXCLUDED.raw_data,
+        latitude = COALESCE(EXCLUDED.latitude, listings.latitude),
+        longitude = COALESCE(EXCLUDED.longitude, listings.longitude),
+        sale_type_source = COALESCE(EXCLUDED.sale_type_source, listings.sale_type_source),
+        sale_type_signal = COALESCE(EXCLUDED.sale_type_signal, listings.sale_type_signal),
+        sale_type_confidence = COALESCE(EXCLUDED.sale_type_confidence, listings.sale_type_confidence),
+        address_norm = COALESCE(EXCLUDED.address_norm, listings.address_norm),
+        address_hash = COALESCE(EXCLUDED.address_hash, listings.address_hash),
+        county = COALESCE(EXCLUDED.county, listings.county),
+        fips_code = COALESCE(EXCLUDED.fips_code, listings.fips_code),
+        neighborhoods = COALESCE(EXCLUDED.neighborhoods, listings.neighborhoods),
+        last_sold_price = COALESCE(EXCLUDED.last_sold_price, listings.last_sold_price),
+        last_sold_date = COALESCE(EXCLUDED.last_sold_date, listings.last_sold_date),
+        assessed_value = COALESCE(EXCLUDED.assessed_value, listings.assessed_value),
+        estimated_value = COALESCE(EXCLUDED.estimated_value, listings.estimated_value),
+        description = COALESCE(EXCLUDED.description, listings.description),
+        style = COALESCE(EXCLUDED.style, listings.style),
+        new_construction = COALESCE(EXCLUDED.new_construction, listings.new_construction),
+        list_date = COALESCE(EXCLUDED.list_date, listings.list_date),
+        price_per_sqft = COALESCE(EXCLUDED.price_per_sqft, listings.price_per_sqft),
+        hoa_fee = COALESCE(EXCLUDED.hoa_fee, listings.hoa_fee),
+        tax_annual_amount = COALESCE(EXCLUDED.tax_annual_amount, listings.tax_annual_amount),
+        property_url = COALESCE(EXCLUDED.property_url, listings.property_url),
+        parking_garage = COALESCE(EXCLUDED.parking_garage, listings.parking_garage),
+        lot_sqft = COALESCE(EXCLUDED.lot_sqft, listings.lot_sqft),
+        stories = COALESCE(EXCLUDED.stories, listings.stories),
+        nearby_schools = COALESCE(EXCLUDED.nearby_schools, listings.nearby_schools),
+        agent_info = COALESCE(EXCLUDED.agent_info, listings.agent_info),
+        tax_history = COALESCE(EXCLUDED.tax_history, listings.tax_history),
+        last_seen_at = now(),
+        updated_at = NOW()
+    WHERE (EXCLUDED.price IS NOT NULL AND listings.price IS DISTINCT FROM EXCLUDED.price)
+       OR (EXCLUDED.bedrooms IS NOT NULL AND listings.bedrooms IS DISTINCT FROM EXCLUDED.bedrooms)
+       OR (EXCLUDED.bathrooms IS NOT NULL AND listings.bathrooms IS DISTINCT FROM EXCLUDED.bathrooms)
+       OR (EXCLUDED.sqft IS NOT NULL AND listings.sqft IS DISTINCT FROM EXCLUDED.sqft)
+       OR (EXCLUDED.year_built IS NOT NULL AND listings.year_built IS DISTINCT FROM EXCLUDED.year_built)
+       OR (EXCLUDED.property_type IS NOT NULL AND listings.property_type IS DISTINCT FROM EXCLUDED.property_type)
+       OR (EXCLUDED.sale_type_source IS NOT NULL AND listings.sale_type_source IS DISTINCT FROM EXCLUDED.sale_type_source)
+       OR (EXCLUDED.sale_type_signal IS NOT NULL AND listings.sale_type_signal IS DISTINCT FROM EXCLUDED.sale_type_signal)
+       OR (EXCLUDED.sale_type_confidence IS NOT NULL AND listings.sale_type_confidence IS DISTINCT FROM EXCLUDED.sale_type_confidence)
+       OR (EXCLUDED.latitude IS NOT NULL AND listings.latitude IS DISTINCT FROM EXCLUDED.latitude)
+       OR (EXCLUDED.longitude IS NOT NULL AND listings.longitude IS DISTINCT FROM EXCLUDED.longitude)
+       OR (EXCLUDED.county IS NOT NULL AND listings.county IS DISTINCT FROM EXCLUDED.county)
+       OR (EXCLUDED.fips_code IS NOT NULL AND listings.fips_code IS DISTINCT FROM EXCLUDED.fips_code)
+       OR (EXCLUDED.neighborhoods IS NOT NULL AND listings.neighborhoods IS DISTINCT FROM EXCLUDED.neighborhoods)
+       OR (EXCLUDED.last_sold_price IS NOT NULL AND listings.last_sold_price IS DISTINCT FROM EXCLUDED.last_sold_price)
+       OR (EXCLUDED.last_sold_date IS NOT NULL AND listings.last_sold_date IS DISTINCT FROM EXCLUDED.last_sold_date)
+       OR (EXCLUDED.assessed_value IS NOT NULL AND listings.assessed_value IS DISTINCT FROM EXCLUDED.assessed_value)
+       OR (EXCLUDED.estimated_value IS NOT NULL AND listings.estimated_value IS DISTINCT FROM EXCLUDED.estimated_value)
+       OR (EXCLUDED.description IS NOT NULL AND listings.description IS DISTINCT FROM EXCLUDED.description)
+       OR (EXCLUDED.style IS NOT NULL AND listings.style IS DISTINCT FROM EXCLUDED.style)
+       OR (EXCLUDED.new_construction IS NOT NULL AND listings.new_construction IS DISTINCT FROM EXCLUDED.new_construction)
+       OR (EXCLUDED.list_date IS NOT NULL AND listings.list_date IS DISTINCT FROM EXCLUDED.list_date)
+       OR (EXCLUDED.price_per_sqft IS NOT NULL AND listings.price_per_sqft IS DISTINCT FROM EXCLUDED.price_per_sqft)
+       OR (EXCLUDED.hoa_fee IS NOT NULL AND listings.hoa_fee IS DISTINCT FROM EXCLUDED.hoa_fee)
+       OR (EXCLUDED.tax_annual_amount IS NOT NULL AND listings.tax_annual_amount IS DISTINCT FROM EXCLUDED.tax_annual_amount)
+       OR (EXCLUDED.property_url IS NOT NULL AND listings.property_url IS DISTINCT FROM EXCLUDED.property_url)
+       OR (EXCLUDED.parking_garage IS NOT NULL AND listings.parking_garage IS DISTINCT FROM EXCLUDED.parking_garage)
+       OR (EXCLUDED.lot_sqft IS NOT NULL AND listings.lot_sqft IS DISTINCT FROM EXCLUDED.lot_sqft)
+       OR (EXCLUDED.stories IS NOT NULL AND listings.stories IS DISTINCT FROM EXCLUDED.stories)
+       OR (EXCLUDED.nearby_schools IS NOT NULL AND listings.nearby_schools IS DISTINCT FROM EXCLUDED.nearby_schools)
+       OR (EXCLUDED.agent_info IS NOT NULL AND listings.agent_info IS DISTINCT FROM EXCLUDED.agent_info)
+       OR (EXCLUDED.tax_history IS NOT NULL AND listings.tax_history IS DISTINCT FROM EXCLUDED.tax_history)
+       -- Re-seen-but-unchanged listings must still advance last_seen_at
+       -- (the reaper keys entirely off it; a frozen value false-stales a
+       -- healthy listing). Bounded to once/day to cap write amplification.
+       -- NOTE: this refresh path also bumps updated_at (accepted tradeoff).
+       OR listings.last_seen_at < now() - interval '1 day'
+    RETURNING id, (xmax = 0) as was_inserted
+"""
+
+
+def _copy_value(v) -> str:
+    """One field in COPY text format: \\N for NULL, backslash escapes otherwise."""
+    if v is None:
+        return "\\N"
+    s = v if isinstance(v, str) else str(v)
+    return (s.replace("\\", "\\\\").replace("\t", "\\t")
+             .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy_rows(cursor, table: str, columns, rows) -> None:
+    """COPY rows (tuples matching columns) into table in one round-trip."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+# A plain blocking function on purpose: every slow step in here is a
+# blocking library (homeharvest, the Census/Nominatim calls fanned out on
+# threads in batch_geocode, and psycopg2, which is down to a handful of
+# statements per scrape since the COPY load). An async rewrite on asyncpg +
+# httpx.AsyncClient would still have to push homeharvest to a thread, and it
+# would fork the DB layer away from the padmapper path and the psycopg2 tests.
+# The /scrape route and the /scrape/jobs workers below call it on threads.
 def scrape_listings(req: ScrapeRequest):
     try:
         # Dispatch to padmapper adapter if source is padmapper
@@ -322,6 +716,16 @@ def scrape_listings(req: ScrapeRequest):
             scrape_kwargs["date_from"] = req.date_from
         if req.date_to:
             scrape_kwargs["date_to"] = req.date_to
+        # Push the price/beds filters into the realtor.com query so rows we
+        # would drop never cross the wire or count against the rate budget.
+        # HomeHarvest takes whole-dollar bounds, so they are widened to ints
+        # here and the exact mask below still applies.
+        if req.min_price is not None:
+            scrape_kwargs["price_min"] = math.floor(req.min_price)
+        if req.max_price is not None:
+            scrape_kwargs["price_max"] = math.ceil(req.max_price)
+        if req.beds_min is not None:
+            scrape_kwargs["beds_min"] = req.beds_min
         import time as _time
         _t0 = _time.time()
         _exc = None
@@ -360,26 +764,23 @@ def scrape_listings(req: ScrapeRequest):
         else:
             df['baths'] = 0
 
+        # The same filters were pushed into the scrape above; this is the
+        # exact pass. One combined mask and a single copy of the surviving
+        # rows, rather than a full-frame copy per filter (as scraper.py does).
+        mask = pd.Series(True, index=df.index)
         if req.min_price is not None:
-            df = df[df['list_price'] >= req.min_price]
+            mask &= df['list_price'] >= req.min_price
         if req.max_price is not None:
-            df = df[df['list_price'] <= req.max_price]
+            mask &= df['list_price'] <= req.max_price
         if req.beds_min is not None:
-            df = df[df['beds'] >= req.beds_min]
+            mask &= df['beds'] >= req.beds_min
+        if not mask.all():
+            df = df.loc[mask]
 
-        records = df.to_dict(orient='records')
-        
-        clean_records = []
-        for rec in records:
-            clean_rec = {}
-            for k, v in rec.items():
-                if isinstance(v, (list, tuple, dict, set)):
-                    clean_rec[k] = v
-                elif pd.isna(v):
-                    clean_rec[k] = None
-                else:
-                    clean_rec[k] = v
-            clean_records.append(clean_rec)
+        clean_records = records(jsonify_df(df))
+        # Built once for the whole frame; both the geocode pass and the
+        # write pass below key on the same strings.
+        addresses = format_addresses(df)
 
         if not clean_records:
             return {"count": 0, "inserted": 0, "updated": 0, "skipped": 0, "blocked": False}
@@ -408,11 +809,8 @@ def scrape_listings(req: ScrapeRequest):
             if coords:
                 source_coords[i] = coords
                 continue
-            zip_raw = row.get('zip_code')
-            zip_code = str(zip_raw).split('.')[0].zfill(5) if zip_raw else ""
-            address = f"{row.get('street', '')}, {row.get('city', '')}, {row.get('state', '')} {zip_code}".strip(", ")
-            if address:
-                address_list.append((i, address))
+            if addresses[i]:
+                address_list.append((i, addresses[i]))
 
         # Phase 2: Geocode only the remainder (Census parallel + Nominatim fallback)
         print(f"Coords from source: {len(source_coords)}/{len(clean_records)}; "
@@ -420,7 +818,107 @@ def scrape_listings(req: ScrapeRequest):
         coords_map = batch_geocode(address_list) if address_list else {}
         print(f"Geocoded {len(coords_map)}/{len(address_list)} addresses")
 
-        # Phase 3: Process and insert
+        # Phase 3: Process rows into per-table staging batches
+        listing_rows = []
+        rental_rows = []
+        sold_rows = []
+        skipped = 0
+        images_by_row = image_lists(df)
+
+        for i, row in enumerate(clean_records):
+            # Per-row routing. For a combined call we trust each row's own
+            # `status`; otherwise the request-level listing_type drives it.
+            row_status = str(row.get('status') or '').strip().lower()
+            if is_combined and row_status not in _FOR_SALE_STATUSES and 'rent' not in row_status and row_status != 'sold':
+                print(f"WARN: unexpected combined-row status '{row_status}' -> routing to listings (for_sale)")
+            row_type = route_row_type(row_status, is_combined, req.listing_type, row.get('property_url'))
+            is_rental = row_type == 'for_rent'
+            is_sold = row_type == 'sold'
+
+            zip_raw = row.get('zip_code')
+            zip_code = str(zip_raw).split('.')[0].zfill(5) if zip_raw else ""
+            address = addresses[i]
+
+            if not address:
+                skipped += 1
+                continue
+
+            price = row.get('list_price') or 0
+            bedrooms = row.get('beds')
+            bathrooms = row.get('baths')
+            sqft = row.get('sqft')
+            year_built = row.get('year_built')
+
+            # clean_records came out of jsonify_df (no NaN or datetimes left)
+            # and each record is used once, so it becomes raw_data as-is
+            # rather than being copied; only the lat/lon keys are added.
+            raw_data = row
+
+            # Source coordinates win; geocoding covers only what the source
+            # did not supply. The reverse precedence made every sweep
+            # re-resolve addresses we had already been handed — see Phase 1.
+            coords = source_coords.get(i) or coords_map.get(i)
+            if coords:
+                raw_data["lat"], raw_data["lon"] = coords
+            else:
+                raw_data["lat"] = None
+                raw_data["lon"] = None
+
+            if is_rental:
+                rental_rows.append((
+                    i, address, row.get('city'), row.get('state'), zip_code, price,
+                    bedrooms, bathrooms, sqft, get_property_type(row),
+                    raw_data["lat"], raw_data["lon"], dumps(raw_data),
+                ))
+            elif is_sold:
+                sold_price = _num(row.get('sold_price'))
+                sold_date = _date(row.get('last_sold_date'))
+                list_price = _num(row.get('list_price'))
+                # Source feeds placeholder/typo dates: a 2099-01-01
+                # "pending" sentinel and outright future typos. A sale
+                # cannot be in the future — reject so they never pollute
+                # comps/ARV/market stats.
+                if sold_date and sold_date > dt.date.today():
+                    sold_date = None
+                if not sold_price or sold_price <= 0 or not sold_date:
+                    skipped += 1
+                    continue
+                sold_rows.append((
+                    i, address, row.get('city'), row.get('state'), zip_code,
+                    sold_price, sold_date, list_price,
+                    _num(row.get('beds')), _num(row.get('baths')),
+                    int(_num(row.get('sqft'))) if _num(row.get('sqft')) else None,
+                    int(_num(row.get('year_built'))) if _num(row.get('year_built')) else None,
+                    _num(row.get('lot_sqft')),
+                    get_property_type(row),
+                    raw_data["lat"], raw_data["lon"],
+                    dumps(raw_data),
+                ))
+            # NOTE: census_tract is assigned via nightly backfill
+            # (backfill_census_tract.sql) instead of at-scrape ST_Contains,
+            # which was measured as too slow per spec §B3 fallback plan.
+            else:
+                # Extract enrichment fields for insertion
+                enr = extract_enrichment(raw_data)
+
+                images = images_by_row[i]
+
+                listing_rows.append((
+                    i, address, row.get('city'), row.get('state'), zip_code, price,
+                    bedrooms, bathrooms, sqft, year_built, get_property_type(row),
+                    row_type, dumps(images), dumps(raw_data),
+                    raw_data["lat"], raw_data["lon"],
+                    enr["county"], enr["fips_code"], enr["neighborhoods"],
+                    enr["last_sold_price"], enr["last_sold_date"], enr["assessed_value"],
+                    enr["estimated_value"], enr["description"], enr["style"],
+                    enr["new_construction"], enr["list_date"], enr["price_per_sqft"],
+                    enr["hoa_fee"], enr["tax_annual_amount"], enr["property_url"],
+                    enr["parking_garage"], enr["lot_sqft"],
+                    enr["stories"], enr["nearby_schools"], enr["agent_info"], enr["tax_history"],
+                ))
+
+        # Phase 4: COPY each batch into staging and merge it in one statement
+        # per table. One transaction, one commit.
         conn = get_db_connection()
         if not conn:
             raise HTTPException(status_code=500, detail="Database connection failed")
@@ -428,283 +926,54 @@ def scrape_listings(req: ScrapeRequest):
         cursor = conn.cursor()
         inserted = 0
         updated = 0
-        skipped = 0
 
         try:
-            for i, row in enumerate(clean_records):
-                # Per-row routing. For a combined call we trust each row's own
-                # `status`; otherwise the request-level listing_type drives it.
-                row_status = str(row.get('status') or '').strip().lower()
-                if is_combined and row_status not in _FOR_SALE_STATUSES and 'rent' not in row_status and row_status != 'sold':
-                    print(f"WARN: unexpected combined-row status '{row_status}' -> routing to listings (for_sale)")
-                row_type = route_row_type(row_status, is_combined, req.listing_type, row.get('property_url'))
-                is_rental = row_type == 'for_rent'
-                is_sold = row_type == 'sold'
-
-                zip_raw = row.get('zip_code')
-                zip_code = str(zip_raw).split('.')[0].zfill(5) if zip_raw else ""
-                address = f"{row.get('street', '')}, {row.get('city', '')}, {row.get('state', '')} {zip_code}".strip(", ")
-                
-                if not address or address == "":
-                    skipped += 1
-                    continue
-
-                price = row.get('list_price') or 0
-                bedrooms = row.get('beds')
-                bathrooms = row.get('baths')
-                sqft = row.get('sqft')
-                year_built = row.get('year_built')
-
-                raw_data = dict(row)
-                for k, v in raw_data.items():
-                    if isinstance(v, (list, tuple, dict, set)):
-                        continue
-                    if pd.isna(v) if hasattr(pd, 'isna') else v != v:
-                        raw_data[k] = None
-                    elif hasattr(v, 'isoformat'):
-                        raw_data[k] = v.isoformat()
-
-                # Source coordinates win; geocoding covers only what the source
-                # did not supply. The reverse precedence made every sweep
-                # re-resolve addresses we had already been handed — see Phase 1.
-                coords = source_coords.get(i) or coords_map.get(i)
-                if coords:
-                    raw_data["lat"], raw_data["lon"] = coords
-                else:
-                    raw_data["lat"] = None
-                    raw_data["lon"] = None
-
-                # Extract enrichment fields for insertion
-                enr = extract_enrichment(raw_data)
-
-                images = []
-                if row.get('primary_photo'):
-                    images.append(row['primary_photo'])
-                if row.get('alt_photos'):
-                    alts = str(row['alt_photos'])
-                    if alts and alts.lower() != 'nan':
-                        images.extend([u.strip() for u in alts.split(',') if u.strip()])
-
-                if is_rental:
-                    cursor.execute("SELECT id, price FROM rental_listings WHERE address = %s AND listing_date = CURRENT_DATE", (address,))
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        skipped += 1
-                        continue
-                    else:
-                        cursor.execute("""
-                            INSERT INTO rental_listings (
-                                address, city, state, zip_code, price, bedrooms, bathrooms,
-                                sqft, property_type, latitude, longitude, source, raw_data
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            address, row.get('city'), row.get('state'), zip_code, price,
-                            bedrooms, bathrooms, sqft, get_property_type(row),
-                            raw_data.get("lat"), raw_data.get("lon"), 
-                            'homeharvest', Json(raw_data)
-                        ))
-                        inserted += 1
-                elif is_sold:
-                    sold_price = _num(row.get('sold_price'))
-                    sold_date = _date(row.get('last_sold_date'))
-                    list_price = _num(row.get('list_price'))
-                    # Source feeds placeholder/typo dates: a 2099-01-01
-                    # "pending" sentinel and outright future typos. A sale
-                    # cannot be in the future — reject so they never pollute
-                    # comps/ARV/market stats.
-                    if sold_date and sold_date > dt.date.today():
-                        sold_date = None
-                    if not sold_price or sold_price <= 0 or not sold_date:
-                        skipped += 1
-                        continue
-                    cursor.execute("""
-                        INSERT INTO sold_listings (
-                            address, city, state, zip_code,
-                            sold_price, sold_date, list_price,
-                            bedrooms, bathrooms, sqft, year_built, lot_sqft,
-                            property_type, latitude, longitude, source, raw_data
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (address, sold_date) DO NOTHING
-                    """, (
-                        address, row.get('city'), row.get('state'), zip_code,
-                        sold_price, sold_date, list_price,
-                        _num(row.get('beds')), _num(row.get('baths')),
-                        int(_num(row.get('sqft'))) if _num(row.get('sqft')) else None,
-                        int(_num(row.get('year_built'))) if _num(row.get('year_built')) else None,
-                        _num(row.get('lot_sqft')),
-                        get_property_type(row),
-                        raw_data.get("lat"), raw_data.get("lon"),
-                        'homeharvest', Json(raw_data)
-                    ))
-                    if cursor.rowcount > 0:
-                        inserted += 1
-                    else:
-                        skipped += 1
-                # NOTE: census_tract is assigned via nightly backfill
-                # (backfill_census_tract.sql) instead of at-scrape ST_Contains,
-                # which was measured as too slow per spec §B3 fallback plan.
-                else:
-                    # RESURRECTION, before the upsert.
-                    #
-                    # A listing that was archived as cold can come back on the
-                    # market. If it is only in listings_archive, the upsert's
-                    # ON CONFLICT (address, listing_type, sale_type) sees no
-                    # conflict and INSERTs a second row — and when that row is
-                    # later archived, the archive holds duplicates for a key the
-                    # live table treats as unique. That is the same constraint
-                    # docs/perf/2026-07-hot-cold-decision.md refused to weaken
-                    # for partitioning, defeated through the back door.
-                    #
-                    # DELETE ... RETURNING then INSERT is atomic inside this
-                    # transaction, so the row is never in both tables and never
-                    # in neither. The id is preserved: a changed id would break
-                    # every saved property, alert, and shared URL.
-                    # Matched on (address, listing_type) rather than the full
-                    # conflict key: sale_type is decided by classify_sale_type()
-                    # inside the upsert's SQL and is not known here. Restoring
-                    # every archived row for this address is the safe direction —
-                    # moving a row back to the live table is reversible; leaving
-                    # one behind creates the duplicate this exists to prevent.
-                    cursor.execute(_resurrect_sql(cursor), (address, row_type))
-
-                    cursor.execute("""
-                        INSERT INTO listings (
-                            address, city, state, zip_code, price, bedrooms, bathrooms,
-                            sqft, year_built, property_type, listing_type, images, raw_data,
-                            latitude, longitude, user_id,
-                            sale_type, sale_type_source, sale_type_signal, sale_type_confidence,
-                            address_norm, address_hash,
-                            county, fips_code, neighborhoods, last_sold_price, last_sold_date,
-                            assessed_value, estimated_value, description, style, new_construction,
-                            list_date, price_per_sqft, hoa_fee, tax_annual_amount, property_url,
-                            parking_garage, lot_sqft,
-                            stories, nearby_schools, agent_info, tax_history,
-                            last_seen_at
-                        )
-                        SELECT
-                            %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s,
-                            CASE WHEN %s::bool AND c.sale_type = 'standard' THEN 'foreclosure' ELSE c.sale_type END,
-                            CASE WHEN %s::bool AND c.sale_type = 'standard' THEN 'homeharvest_flag' ELSE c.sale_type_source END,
-                            CASE WHEN %s::bool AND c.sale_type = 'standard' THEN 'homeharvest foreclosure filter' ELSE c.sale_type_signal END,
-                            CASE WHEN %s::bool AND c.sale_type = 'standard' THEN 0.95 ELSE c.sale_type_confidence END,
-                            n.address_norm,
-                            md5(coalesce(n.address_norm, '') || '|' || coalesce(lower(%s), '') || '|' || coalesce(lower(%s), '')),
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s,
-                            now()
-                        FROM classify_sale_type(%s::jsonb, %s) c,
-                             LATERAL (
-                                 SELECT NULLIF(regexp_replace(regexp_replace(lower(trim(%s)), '[.,#]', '', 'g'), '\\s+', ' ', 'g'), '') AS address_norm
-                             ) n
-                        ON CONFLICT (address, listing_type, sale_type)
-                        DO UPDATE SET
-                            price = EXCLUDED.price,
-                            bedrooms = COALESCE(EXCLUDED.bedrooms, listings.bedrooms),
-                            bathrooms = COALESCE(EXCLUDED.bathrooms, listings.bathrooms),
-                            sqft = COALESCE(EXCLUDED.sqft, listings.sqft),
-                            year_built = COALESCE(EXCLUDED.year_built, listings.year_built),
-                            property_type = COALESCE(EXCLUDED.property_type, listings.property_type),
-                            images = EXCLUDED.images,
-                            raw_data = EXCLUDED.raw_data,
-                            latitude = COALESCE(EXCLUDED.latitude, listings.latitude),
-                            longitude = COALESCE(EXCLUDED.longitude, listings.longitude),
-                            sale_type_source = COALESCE(EXCLUDED.sale_type_source, listings.sale_type_source),
-                            sale_type_signal = COALESCE(EXCLUDED.sale_type_signal, listings.sale_type_signal),
-                            sale_type_confidence = COALESCE(EXCLUDED.sale_type_confidence, listings.sale_type_confidence),
-                            address_norm = COALESCE(EXCLUDED.address_norm, listings.address_norm),
-                            address_hash = COALESCE(EXCLUDED.address_hash, listings.address_hash),
-                            county = COALESCE(EXCLUDED.county, listings.county),
-                            fips_code = COALESCE(EXCLUDED.fips_code, listings.fips_code),
-                            neighborhoods = COALESCE(EXCLUDED.neighborhoods, listings.neighborhoods),
-                            last_sold_price = COALESCE(EXCLUDED.last_sold_price, listings.last_sold_price),
-                            last_sold_date = COALESCE(EXCLUDED.last_sold_date, listings.last_sold_date),
-                            assessed_value = COALESCE(EXCLUDED.assessed_value, listings.assessed_value),
-                            estimated_value = COALESCE(EXCLUDED.estimated_value, listings.estimated_value),
-                            description = COALESCE(EXCLUDED.description, listings.description),
-                            style = COALESCE(EXCLUDED.style, listings.style),
-                            new_construction = COALESCE(EXCLUDED.new_construction, listings.new_construction),
-                            list_date = COALESCE(EXCLUDED.list_date, listings.list_date),
-                            price_per_sqft = COALESCE(EXCLUDED.price_per_sqft, listings.price_per_sqft),
-                            hoa_fee = COALESCE(EXCLUDED.hoa_fee, listings.hoa_fee),
-                            tax_annual_amount = COALESCE(EXCLUDED.tax_annual_amount, listings.tax_annual_amount),
-                            property_url = COALESCE(EXCLUDED.property_url, listings.property_url),
-                            parking_garage = COALESCE(EXCLUDED.parking_garage, listings.parking_garage),
-                            lot_sqft = COALESCE(EXCLUDED.lot_sqft, listings.lot_sqft),
-                            stories = COALESCE(EXCLUDED.stories, listings.stories),
-                            nearby_schools = COALESCE(EXCLUDED.nearby_schools, listings.nearby_schools),
-                            agent_info = COALESCE(EXCLUDED.agent_info, listings.agent_info),
-                            tax_history = COALESCE(EXCLUDED.tax_history, listings.tax_history),
-                            last_seen_at = now(),
-                            updated_at = NOW()
-                        WHERE (EXCLUDED.price IS NOT NULL AND listings.price IS DISTINCT FROM EXCLUDED.price)
-                           OR (EXCLUDED.bedrooms IS NOT NULL AND listings.bedrooms IS DISTINCT FROM EXCLUDED.bedrooms)
-                           OR (EXCLUDED.bathrooms IS NOT NULL AND listings.bathrooms IS DISTINCT FROM EXCLUDED.bathrooms)
-                           OR (EXCLUDED.sqft IS NOT NULL AND listings.sqft IS DISTINCT FROM EXCLUDED.sqft)
-                           OR (EXCLUDED.year_built IS NOT NULL AND listings.year_built IS DISTINCT FROM EXCLUDED.year_built)
-                           OR (EXCLUDED.property_type IS NOT NULL AND listings.property_type IS DISTINCT FROM EXCLUDED.property_type)
-                           OR (EXCLUDED.sale_type_source IS NOT NULL AND listings.sale_type_source IS DISTINCT FROM EXCLUDED.sale_type_source)
-                           OR (EXCLUDED.sale_type_signal IS NOT NULL AND listings.sale_type_signal IS DISTINCT FROM EXCLUDED.sale_type_signal)
-                           OR (EXCLUDED.sale_type_confidence IS NOT NULL AND listings.sale_type_confidence IS DISTINCT FROM EXCLUDED.sale_type_confidence)
-                           OR (EXCLUDED.latitude IS NOT NULL AND listings.latitude IS DISTINCT FROM EXCLUDED.latitude)
-                           OR (EXCLUDED.longitude IS NOT NULL AND listings.longitude IS DISTINCT FROM EXCLUDED.longitude)
-                           OR (EXCLUDED.county IS NOT NULL AND listings.county IS DISTINCT FROM EXCLUDED.county)
-                           OR (EXCLUDED.fips_code IS NOT NULL AND listings.fips_code IS DISTINCT FROM EXCLUDED.fips_code)
-                           OR (EXCLUDED.neighborhoods IS NOT NULL AND listings.neighborhoods IS DISTINCT FROM EXCLUDED.neighborhoods)
-                           OR (EXCLUDED.last_sold_price IS NOT NULL AND listings.last_sold_price IS DISTINCT FROM EXCLUDED.last_sold_price)
-                           OR (EXCLUDED.last_sold_date IS NOT NULL AND listings.last_sold_date IS DISTINCT FROM EXCLUDED.last_sold_date)
-                           OR (EXCLUDED.assessed_value IS NOT NULL AND listings.assessed_value IS DISTINCT FROM EXCLUDED.assessed_value)
-                           OR (EXCLUDED.estimated_value IS NOT NULL AND listings.estimated_value IS DISTINCT FROM EXCLUDED.estimated_value)
-                           OR (EXCLUDED.description IS NOT NULL AND listings.description IS DISTINCT FROM EXCLUDED.description)
-                           OR (EXCLUDED.style IS NOT NULL AND listings.style IS DISTINCT FROM EXCLUDED.style)
-                           OR (EXCLUDED.new_construction IS NOT NULL AND listings.new_construction IS DISTINCT FROM EXCLUDED.new_construction)
-                           OR (EXCLUDED.list_date IS NOT NULL AND listings.list_date IS DISTINCT FROM EXCLUDED.list_date)
-                           OR (EXCLUDED.price_per_sqft IS NOT NULL AND listings.price_per_sqft IS DISTINCT FROM EXCLUDED.price_per_sqft)
-                           OR (EXCLUDED.hoa_fee IS NOT NULL AND listings.hoa_fee IS DISTINCT FROM EXCLUDED.hoa_fee)
-                           OR (EXCLUDED.tax_annual_amount IS NOT NULL AND listings.tax_annual_amount IS DISTINCT FROM EXCLUDED.tax_annual_amount)
-                           OR (EXCLUDED.property_url IS NOT NULL AND listings.property_url IS DISTINCT FROM EXCLUDED.property_url)
-                           OR (EXCLUDED.parking_garage IS NOT NULL AND listings.parking_garage IS DISTINCT FROM EXCLUDED.parking_garage)
-                           OR (EXCLUDED.lot_sqft IS NOT NULL AND listings.lot_sqft IS DISTINCT FROM EXCLUDED.lot_sqft)
-                           OR (EXCLUDED.stories IS NOT NULL AND listings.stories IS DISTINCT FROM EXCLUDED.stories)
-                           OR (EXCLUDED.nearby_schools IS NOT NULL AND listings.nearby_schools IS DISTINCT FROM EXCLUDED.nearby_schools)
-                           OR (EXCLUDED.agent_info IS NOT NULL AND listings.agent_info IS DISTINCT FROM EXCLUDED.agent_info)
-                           OR (EXCLUDED.tax_history IS NOT NULL AND listings.tax_history IS DISTINCT FROM EXCLUDED.tax_history)
-                           -- Re-seen-but-unchanged listings must still advance last_seen_at
-                           -- (the reaper keys entirely off it; a frozen value false-stales a
-                           -- healthy listing). Bounded to once/day to cap write amplification.
-                           -- NOTE: this refresh path also bumps updated_at (accepted tradeoff).
-                           OR listings.last_seen_at < now() - interval '1 day'
-                        RETURNING id, (xmax = 0) as was_inserted
-                    """, (
-                        address, row.get('city'), row.get('state'), zip_code, price,
-                        bedrooms, bathrooms, sqft, year_built, get_property_type(row),
-                        row_type, Json(images), Json(raw_data), raw_data.get("lat"), raw_data.get("lon"),
-                        DEFAULT_USER_ID,
-                        req.foreclosure, req.foreclosure, req.foreclosure, req.foreclosure,
-                        row.get('city'), row.get('state'),
-                        enr["county"], enr["fips_code"], enr["neighborhoods"],
-                        enr["last_sold_price"], enr["last_sold_date"], enr["assessed_value"],
-                        enr["estimated_value"], enr["description"], enr["style"],
-                        enr["new_construction"], enr["list_date"], enr["price_per_sqft"],
-                        enr["hoa_fee"], enr["tax_annual_amount"], enr["property_url"],
-                        enr["parking_garage"], enr["lot_sqft"],
-                        enr["stories"], enr["nearby_schools"], enr["agent_info"], enr["tax_history"],
-                        Json(raw_data), get_property_type(row),
-                        address
-                    ))
-                    result = cursor.fetchone()
-                    if result:
-                        if result[1]:
-                            inserted += 1
-                        else:
-                            updated += 1
-                    else:
-                        skipped += 1
-
-                if (inserted + updated + skipped) % 50 == 0:
-                    conn.commit()
+            if rental_rows:
+                cursor.execute(_STAGE_RENTALS_DDL)
+                _copy_rows(cursor, "_scrape_rentals", _STAGE_RENTALS_COLS, rental_rows)
+                cursor.execute(_INSERT_RENTALS_SQL)
+                inserted += cursor.rowcount
+                skipped += len(rental_rows) - cursor.rowcount
+
+            if sold_rows:
+                cursor.execute(_STAGE_SOLD_DDL)
+                _copy_rows(cursor, "_scrape_sold", _STAGE_SOLD_COLS, sold_rows)
+                cursor.execute(_INSERT_SOLD_SQL)
+                inserted += cursor.rowcount
+                skipped += len(sold_rows) - cursor.rowcount
+
+            if listing_rows:
+                cursor.execute(_STAGE_LISTINGS_DDL)
+                _copy_rows(cursor, "_scrape_listings", _STAGE_LISTINGS_COLS, listing_rows)
+                # RESURRECTION, before the upsert.
+                #
+                # A listing that was archived as cold can come back on the
+                # market. If it is only in listings_archive, the upsert's
+                # ON CONFLICT (address, listing_type, sale_type) sees no
+                # conflict and INSERTs a second row — and when that row is
+                # later archived, the archive holds duplicates for a key the
+                # live table treats as unique. That is the same constraint
+                # docs/perf/2026-07-hot-cold-decision.md refused to weaken
+                # for partitioning, defeated through the back door.
+                #
+                # DELETE ... RETURNING then INSERT is atomic inside this
+                # transaction, so the row is never in both tables and never
+                # in neither. The id is preserved: a changed id would break
+                # every saved property, alert, and shared URL.
+                # Matched on (address, listing_type) rather than the full
+                # conflict key: sale_type is decided by classify_sale_type()
+                # inside the upsert's SQL and is not known here. Restoring
+                # every archived row for this address is the safe direction —
+                # moving a row back to the live table is reversible; leaving
+                # one behind creates the duplicate this exists to prevent.
+                cursor.execute(_resurrect_sql(cursor))
+
+                cursor.execute(_UPSERT_LISTINGS_SQL, {"user_id": DEFAULT_USER_ID, "foreclosure": req.foreclosure})
+                results = cursor.fetchall()
+                new_rows = sum(1 for _, was_inserted in results if was_inserted)
+                inserted += new_rows
+                updated += len(results) - new_rows
+                skipped += len(listing_rows) - len(results)
 
             conn.commit()
 
@@ -714,7 +983,7 @@ def scrape_listings(req: ScrapeRequest):
             raise HTTPException(status_code=500, detail=f"DB Error: {str(e)}")
         finally:
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
         print(f"Completed {req.location}: {inserted} inserted, {updated} updated, {skipped} skipped")
         return {"count": len(clean_records), "inserted": inserted, "updated": updated, "skipped": skipped, "blocked": False}
@@ -726,6 +995,104 @@ def scrape_listings(req: ScrapeRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# /scrape is an async route that hands the whole scrape to its own bounded
+# executor. As a sync route it ran on Starlette's shared threadpool (40 AnyIO
+# tokens for every sync endpoint), so a burst of scrapes also left /health
+# and /scrape/jobs polling waiting for a token. Sized to the DB pool so every
+# in-flight scrape can hold a pooled connection; further requests wait in the
+# executor's queue instead of opening direct connections.
+SCRAPE_THREADS = int(os.getenv("SCRAPE_THREADS", str(DB_POOL_MAX)))
+_scrape_executor = ThreadPoolExecutor(max_workers=SCRAPE_THREADS, thread_name_prefix="scrape")
+
+
+@app.post("/scrape")
+async def scrape(req: ScrapeRequest):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_scrape_executor, scrape_listings, req)
+
+
+# ---------------------------------------------------------------------------
+# Queued scrapes
+# ---------------------------------------------------------------------------
+
+# Opt-in fire-and-forget variant of /scrape. /scrape itself still answers with
+# the result: the crawl worker reads its counts and treats its 429 as the block signal.
+# A caller that only needs the work done posts to /scrape/jobs and gets a 202
+# and a job id at once. SCRAPE_JOB_WORKERS threads drain a queue of at most
+# SCRAPE_JOB_QUEUE_MAX jobs; when it is full the answer is 503 + Retry-After
+# rather than an ever-growing backlog in memory. Only the last SCRAPE_JOBS_KEPT
+# job records are kept for GET /scrape/jobs/{id}.
+SCRAPE_JOB_WORKERS = int(os.getenv("SCRAPE_JOB_WORKERS", "2"))
+SCRAPE_JOB_QUEUE_MAX = int(os.getenv("SCRAPE_JOB_QUEUE_MAX", "64"))
+SCRAPE_JOBS_KEPT = 1000
+
+_job_queue: "queue.Queue[tuple[str, ScrapeRequest]]" = queue.Queue(maxsize=SCRAPE_JOB_QUEUE_MAX)
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+_jobs_lock = threading.Lock()
+_job_workers: list[threading.Thread] = []
+
+
+def _set_job(job_id: str, **fields) -> None:
+    with _jobs_lock:
+        _jobs.setdefault(job_id, {}).update(fields)
+        while len(_jobs) > SCRAPE_JOBS_KEPT:
+            _jobs.popitem(last=False)
+
+
+def _job_worker() -> None:
+    """Drain _job_queue until a None sentinel is taken off it."""
+    while True:
+        item = _job_queue.get()
+        if item is None:
+            _job_queue.task_done()
+            return
+        job_id, req = item
+        _set_job(job_id, status="running")
+        try:
+            _set_job(job_id, status="done", result=scrape_listings(req))
+        except HTTPException as e:
+            _set_job(job_id, status="failed", status_code=e.status_code, detail=e.detail)
+        except Exception as e:
+            _set_job(job_id, status="failed", status_code=500, detail=str(e))
+        finally:
+            _job_queue.task_done()
+
+
+def _start_job_workers() -> None:
+    """Start the worker threads on first use, so importing main stays cheap."""
+    with _jobs_lock:
+        if _job_workers:
+            return
+        for n in range(SCRAPE_JOB_WORKERS):
+            t = threading.Thread(target=_job_worker, name=f"scrape-job-{n}", daemon=True)
+            t.start()
+            _job_workers.append(t)
+
+
+@app.post("/scrape/jobs", status_code=202)
+def enqueue_scrape(req: ScrapeRequest):
+    _start_job_workers()
+    job_id = uuid.uuid4().hex
+    _set_job(job_id, status="queued")
+    try:
+        _job_queue.put_nowait((job_id, req))
+    except queue.Full:
+        with _jobs_lock:
+            _jobs.pop(job_id, None)
+        raise HTTPException(status_code=503, detail="scrape queue full", headers={"Retry-After": "30"})
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/scrape/jobs/{job_id}")
+def scrape_job(job_id: str):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        job = dict(job) if job is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return {"job_id": job_id, **job}
+
+
 # ---------------------------------------------------------------------------
 # PadMapper adapter support
 # ---------------------------------------------------------------------------
@@ -934,18 +1301,6 @@ def _geocode_zip_to_bbox(zip_code: str, conn) -> Optional[tuple[float, float, fl
     return None
 
 
-def _check_dupe_address(address: str, conn) -> bool:
-    """Check if address exists in rental_listings from any source in the last 14 days."""
-    cur = conn.cursor()
-    cur.execute(f"""
-        SELECT 1 FROM rental_listings 
-        WHERE {ADDRESS_NORM_SQL} = lower(regexp_replace(trim(%s), '\\s+', ' ', 'g'))
-          AND listing_date > now() - interval '14 days' 
-        LIMIT 1
-    """, (address,))
-    return cur.fetchone() is not None
-
-
 def _scrape_padmapper(req: ScrapeRequest) -> dict:
     """Handle PadMapper scraping: geocode ZIP to bbox, fetch, normalize, upsert."""
     from adapters.padmapper import normalize, fetch_bbox, SourceBlockedError
@@ -987,15 +1342,19 @@ def _scrape_padmapper(req: ScrapeRequest) -> dict:
         skipped = 0
         
         try:
-            # Batch-fetch existing addresses for dedup (O(1) per listing instead of per-listing DB query)
-            cursor.execute("""
-                SELECT DISTINCT lower(regexp_replace(trim(address), '\\s+', ' ', 'g'))
+            # One round-trip for dedup: which of THIS response's addresses were
+            # stored (from any source) in the last 14 days. Served by the
+            # idx_rental_address_norm_date expression index (out-of-band).
+            norm_addrs = list({re.sub(r'\s+', ' ', l["address"].strip().lower()) for l in normalized})
+            cursor.execute(f"""
+                SELECT DISTINCT {ADDRESS_NORM_SQL}
                 FROM rental_listings
-                WHERE listing_date > now() - interval '14 days'
-                   OR (address IS NOT NULL AND listing_date = CURRENT_DATE)
-            """)
+                WHERE {ADDRESS_NORM_SQL} = ANY(%s)
+                  AND listing_date > now() - interval '14 days'
+            """, (norm_addrs,))
             existing_addrs = {row[0] for row in cursor.fetchall()}
             
+            rows = []
             for listing in normalized:
                 address = listing["address"]
                 norm_addr = re.sub(r'\s+', ' ', address.strip().lower())
@@ -1003,20 +1362,26 @@ def _scrape_padmapper(req: ScrapeRequest) -> dict:
                 if norm_addr in existing_addrs:
                     skipped += 1
                     continue
+                # A repeat inside this response would hit the unique
+                # (address, source, listing_date) index mid-batch.
+                existing_addrs.add(norm_addr)
                 
-                # Insert
-                cursor.execute("""
-                    INSERT INTO rental_listings (
-                        address, zip_code, price, bedrooms, bathrooms,
-                        sqft, property_type, latitude, longitude, source, raw_data, listing_date
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_DATE)
-                """, (
+                rows.append((
                     address, zip_code, listing["price"],
                     listing["bedrooms"], listing["bathrooms"], listing["sqft"],
                     listing["property_type"], listing["latitude"], listing["longitude"],
-                    "padmapper", Json(listing)
+                    "padmapper", Json(listing, dumps=dumps)
                 ))
-                inserted += 1
+            
+            # One multi-row INSERT per 500 listings instead of one per listing.
+            if rows:
+                execute_values(cursor, """
+                    INSERT INTO rental_listings (
+                        address, zip_code, price, bedrooms, bathrooms,
+                        sqft, property_type, latitude, longitude, source, raw_data, listing_date
+                    ) VALUES %s
+                """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_DATE)", page_size=500)
+                inserted = len(rows)
             
             conn.commit()
             print(f"PadMapper: {inserted} inserted, {skipped} skipped")
@@ -1032,4 +1397,4 @@ def _scrape_padmapper(req: ScrapeRequest) -> dict:
     except SourceBlockedError as e:
         raise HTTPException(status_code=429, detail=f"PadMapper blocked: {e}")
     finally:
-        conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,34 @@
+"""Unit tests for the COPY text-format encoding used by scrape_listings' bulk load."""
+import io
+
+from main import _copy_rows, _copy_value
+
+
+class FakeCursor:
+    def __init__(self):
+        self.sql = None
+        self.data = None
+
+    def copy_expert(self, sql, buf: io.StringIO):
+        self.sql = sql
+        self.data = buf.read()
+
+
+def test_none_is_null_marker():
+    assert _copy_value(None) == "\\N"
+
+
+def test_special_characters_are_escaped():
+    assert _copy_value("a\tb\nc\rd\\e") == "a\\tb\\nc\\rd\\\\e"
+
+
+def test_non_strings_use_str():
+    assert _copy_value(2.5) == "2.5"
+    assert _copy_value(True) == "True"
+
+
+def test_copy_rows_writes_one_line_per_row():
+    cur = FakeCursor()
+    _copy_rows(cur, "_stage", ("ord", "address", "price"), [(0, "1 Main St", None), (1, "2 Oak\tAve", 10)])
+    assert cur.sql == "COPY _stage (ord, address, price) FROM STDIN"
+    assert cur.data == "0\t1 Main St\t\\N\n1\t2 Oak\\tAve\t10\n"
@@ -0,0 +1,46 @@
+"""Unit tests for fetch_rental_comps.upsert_rows() — batch write with per-row fallback."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import fetch_rental_comps
+from fetch_rental_comps import upsert_rows
+
+
+class Conn:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_clean_batch_is_one_commit(monkeypatch):
+    monkeypatch.setattr(fetch_rental_comps, "execute_values", lambda *a, **k: None)
+    conn = Conn()
+    assert upsert_rows(conn, [("1 A",), ("2 B",)]) == 2
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_bad_row_only_costs_itself(monkeypatch):
+    def execute_values(cursor, sql, rows, **kwargs):
+        if ("bad",) in rows:
+            raise ValueError("numeric field overflow")
+
+    monkeypatch.setattr(fetch_rental_comps, "execute_values", execute_values)
+    conn = Conn()
+    assert upsert_rows(conn, [("1 A",), ("bad",), ("2 B",)]) == 2
+    assert conn.rollbacks == 2  # the batch, then the bad row
@@ -1,10 +1,11 @@
 import main
+import scrape_common
 
 
 def _setup(monkeypatch, cap, census_hits=(), nominatim_all_fail=True):
-    """Patch out the network + sleep. census_hits = set of indices Census resolves."""
+    """Patch out the network. census_hits = set of indices Census resolves."""
     monkeypatch.setattr(main, "MAX_NOMINATIM_FALLBACK", cap)
-    monkeypatch.setattr(main, "sleep", lambda _s: None)
+    monkeypatch.setattr(main._geocode_cache, "mem", {})
 
     calls = {"census": 0, "nominatim": 0}
     hitset = set(census_hits)
@@ -19,7 +20,12 @@ def _setup(monkeypatch, cap, census_hits=(), nominatim_all_fail=True):
         calls["nominatim"] += 1
         return None if nominatim_all_fail else (3.0, 4.0)
 
+    def fake_census_batch(address_list):
+        # The batch endpoint is still Census: one lookup per address.
+        return {idx: coords for idx, addr in address_list if (coords := fake_census(addr))}
+
     monkeypatch.setattr(main, "geocode_address_census", fake_census)
+    monkeypatch.setattr(main, "geocode_census_batch", fake_census_batch)
     monkeypatch.setattr(main, "geocode_address_nominatim", fake_nominatim)
     return calls
 
@@ -59,3 +65,148 @@ def test_capped_rows_are_simply_absent_from_the_result(monkeypatch):
     _setup(monkeypatch, cap=5)
     result = main.batch_geocode(_addrs(20))
     assert result == {}  # nothing resolved, 15 skipped silently
+
+
+def test_split_address_matches_the_scraper_format():
+    assert scrape_common.split_address("12 Main St, Austin, TX 78701") == ("12 Main St", "Austin", "TX", "78701")
+    assert scrape_common.split_address("Unit 4, 12 Main St, Austin, TX 78701") == ("Unit 4, 12 Main St", "Austin", "TX", "78701")
+    assert scrape_common.split_address("nowhere") == ("nowhere", "", "", "")
+
+
+def test_census_batch_parses_matches_only(monkeypatch):
+    body = (
+        '"0","1 A St, X, TX, 78701","Match","Exact","1 A ST, X, TX, 78701","-97.5,30.25","1","L"\n'
+        '"1","2 B St, X, TX, 78701","No_Match"\n'
+        '"2","3 C St, X, TX, 78701","Tie"\n'
+    )
+
+    class Resp:
+        text = body
+
+        def raise_for_status(self):
+            pass
+
+    posted = []
+    monkeypatch.setattr(main._http, "post", lambda url, **kw: posted.append(kw) or Resp())
+    result = main.geocode_census_batch([(0, "1 A St, X, TX 78701"), (1, "2 B St, X, TX 78701"), (2, "3 C St, X, TX 78701")])
+    assert result == {0: (30.25, -97.5)}
+    assert len(posted) == 1
+    assert posted[0]["files"]["addressFile"][1].splitlines()[0] == "0,1 A St,X,TX,78701"
+
+
+def test_small_lists_skip_the_batch_endpoint(monkeypatch):
+    _setup(monkeypatch, cap=15, census_hits={0})
+
+    def boom(_):
+        raise AssertionError("batch endpoint used for a small list")
+
+    monkeypatch.setattr(main, "geocode_census_batch", boom)
+    assert main.batch_geocode(_addrs(2)) == {0: (1.0, 2.0)}
+
+
+def test_batch_failure_falls_back_to_per_address(monkeypatch):
+    calls = _setup(monkeypatch, cap=15, census_hits=range(30))
+
+    def down(_):
+        raise RuntimeError("503")
+
+    monkeypatch.setattr(main, "geocode_census_batch", down)
+    result = main.batch_geocode(_addrs(30))
+    assert calls["census"] == 30
+    assert len(result) == 30
+
+
+def test_cached_addresses_skip_the_network(monkeypatch):
+    calls = _setup(monkeypatch, cap=15)
+    addrs = _addrs(3)
+    monkeypatch.setattr(main, "geocode_cache_get", lambda a: {addrs[0][1]: (5.0, 6.0), addrs[1][1]: None})
+    stored = []
+    monkeypatch.setattr(main, "geocode_cache_put", lambda hits, misses: stored.append((hits, misses)))
+    result = main.batch_geocode(addrs)
+    # Cached hit returned, cached miss not retried, only the unknown one looked up.
+    assert result == {0: (5.0, 6.0)}
+    assert calls["census"] == 1
+    assert stored == [([], [addrs[2][1]])]
+
+
+def test_capped_rows_are_not_cached_as_misses(monkeypatch):
+    _setup(monkeypatch, cap=2)
+    stored = []
+    monkeypatch.setattr(main, "geocode_cache_put", lambda hits, misses: stored.append((hits, misses)))
+    main.batch_geocode(_addrs(5))
+    assert len(stored[0][1]) == 2
+
+
+def test_live_hits_land_in_the_memory_cache(monkeypatch):
+    _setup(monkeypatch, cap=15, census_hits={0})
+    main.batch_geocode(_addrs(1))
+    assert main.geocode_cache_get([_addrs(1)[0][1]]) == {_addrs(1)[0][1]: (1.0, 2.0)}
+
+
+def test_nominatim_throttle_spaces_calls(monkeypatch):
+    clock = [100.0]
+    waits = []
+
+    def fake_sleep(s):
+        waits.append(round(s, 3))
+        clock[0] += s
+
+    monkeypatch.setattr(scrape_common, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(scrape_common, "sleep", fake_sleep)
+    throttle = scrape_common.Throttle(1.1)
+    for _ in range(3):
+        throttle.wait()
+    assert waits == [1.1, 1.1]  # first call goes straight through
+
+    clock[0] += 5  # idle longer than the interval: no wait
+    throttle.wait()
+    assert waits == [1.1, 1.1]
+
+
+def test_census_single_parses_raw_body(monkeypatch):
+    class Resp:
+        status_code = 200
+        content = b'{"result": {"addressMatches": [{"coordinates": {"x": -97.7, "y": 30.2}}]}}'
+
+    monkeypatch.setattr(main._http, "get", lambda url, timeout: Resp())
+    assert main.geocode_address_census("1 Main St, Austin, TX 78701") == (30.2, -97.7)
+
+
+def test_repeated_addresses_are_looked_up_once(monkeypatch):
+    calls = _setup(monkeypatch, cap=15, census_hits={0})
+    monkeypatch.setattr(main, "geocode_cache_put", lambda hits, misses: None)
+    addr = "i0 Main St, Town, ST 00000"
+    result = main.batch_geocode([(0, addr), (1, addr), (2, addr.upper())])
+    assert calls["census"] == 1
+    assert result == {0: (1.0, 2.0), 1: (1.0, 2.0), 2: (1.0, 2.0)}
+
+
+def test_cache_put_writes_one_row_per_query_hash(monkeypatch):
+    class Conn:
+        def cursor(self):
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def commit(self):
+            pass
+
+    written = []
+    monkeypatch.setattr(scrape_common, "execute_values", lambda cur, sql, rows, **kw: written.append(rows))
+    errors = []
+    cache = scrape_common.GeocodeCache(connect=Conn, release=lambda c: None, on_error=errors.append)
+    cache.put(
+        hits=[("1 A St, X, TX 78701", (1.0, 2.0), "census"),
+              ("1 a st, x, tx 78701", (1.0, 2.0), "census"),
+              ("1 A St, X, TX 78701", (1.0, 2.0), "nominatim")],
+        misses=["2 B St, X, TX 78701", "2 B ST, X, TX 78701", "1 A ST, X, TX 78701"],
+    )
+    hits, misses = written
+    assert [row[0] for row in hits] == [scrape_common.geocode_key("1 A St, X, TX 78701")]
+    # The miss for 1 A St is dropped: a hit for the same key wins.
+    assert [row[0] for row in misses] == [scrape_common.geocode_key("2 B St, X, TX 78701")]
+    assert errors == []
@@ -0,0 +1,59 @@
+"""Unit tests for scrape_common.jsonify_df() — the frame-level cleanup before /scrape builds rows."""
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from scrape_common import dumps, jsonify_df, records
+
+
+def test_missing_values_become_none():
+    df = pd.DataFrame({"price": [1.0, float("nan")], "city": ["Austin", None], "beds": pd.array([3, None], dtype="Int64")})
+    recs = jsonify_df(df).to_dict(orient="records")
+    assert recs[0] == {"price": 1.0, "city": "Austin", "beds": 3}
+    assert recs[1] == {"price": None, "city": None, "beds": None}
+
+
+def test_datetimes_become_iso_strings_and_lists_pass_through():
+    df = pd.DataFrame({
+        "list_date": pd.to_datetime(["2026-01-02", None]),
+        "nearby_schools": [[{"name": "A"}], None],
+    })
+    recs = jsonify_df(df).to_dict(orient="records")
+    assert recs[0]["list_date"] == "2026-01-02T00:00:00"
+    assert recs[1]["list_date"] is None
+    assert recs[0]["nearby_schools"] == [{"name": "A"}]
+    assert not any(isinstance(v, float) and math.isnan(v) for r in recs for v in r.values())
+
+
+def test_records_serialize_to_json():
+    df = pd.DataFrame({"price": [np.float64(1.5)], "beds": [np.int64(3)], "list_date": pd.to_datetime(["2026-01-02"])})
+    rec = jsonify_df(df).to_dict(orient="records")[0]
+    assert json.loads(dumps(rec)) == {"price": 1.5, "beds": 3, "list_date": "2026-01-02T00:00:00"}
+
+
+def test_datetimes_match_isoformat():
+    naive = pd.Timestamp("2026-01-02 03:04:05.123456")
+    aware = pd.Timestamp("2026-01-02 03:04:05", tz="UTC")
+    df = pd.DataFrame({"naive": [naive, None], "aware": [aware, None]})
+    recs = jsonify_df(df).to_dict(orient="records")
+    assert recs[0] == {"naive": naive.isoformat(), "aware": aware.isoformat()}
+    assert recs[0]["aware"].endswith("+00:00")
+    assert recs[1] == {"naive": None, "aware": None}
+
+
+def test_records_match_to_dict():
+    df = pd.DataFrame({
+        "price": [1.5, float("nan")],
+        "beds": pd.array([3, None], dtype="Int64"),
+        "list_date": pd.to_datetime(["2026-01-02", None]),
+        "nearby_schools": [[{"name": "A"}], None],
+        "is_new": [True, False],
+    })
+    out = jsonify_df(df)
+    expected = out.to_dict(orient="records")
+    got = records(out)
+    assert got == expected
+    assert [{k: type(v) for k, v in r.items()} for r in got] == [{k: type(v) for k, v in r.items()} for r in expected]
+    assert records(pd.DataFrame(index=range(2))) == [{}, {}]
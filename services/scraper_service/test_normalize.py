@@ -9,7 +9,11 @@ import pytest
 
 # Add services/ to path so we can import scraper
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from scraper import normalize_row
+import scraper
+from scraper import (
+    LISTING_COLS, RENTAL_COLS, format_address, format_addresses, geocode_many, image_lists, jsonify_df,
+    normalize_row, process_listing, process_rental, upsert_listings, upsert_rentals, with_retries,
+)
 
 
 @pytest.fixture
@@ -148,6 +152,13 @@ class TestNormalizeRow:
         assert agent["agent_email"] == "jane@example.com"
         assert agent["broker_name"] == "Best Realty"
 
+    def test_raw_data_drops_null_fields(self, for_sale_row):
+        for_sale_row["hoa_fee"] = None
+        result = normalize_row(for_sale_row, "for_sale")
+        assert "hoa_fee" not in result["raw_data"]
+        assert result["raw_data"]["list_price"] == 450000.0
+        assert result["raw_data"]["nearby_schools"] == for_sale_row["nearby_schools"]
+
     def test_for_sale_fips_preserves_leading_zeros(self, for_sale_row):
         for_sale_row["fips_code"] = "01001"
         result = normalize_row(for_sale_row, "for_sale")
@@ -200,3 +211,195 @@ class TestNormalizeRow:
         result = normalize_row(for_sale_row, "for_sale")
         assert len(result["images"]) == 3
         assert result["images"][0] == "https://img.example.com/photo1.jpg"
+
+    def test_image_lists_matches_per_row_split(self, for_sale_row, for_rent_row, sold_row_nan_heavy):
+        for_rent_row["alt_photos"] = " https://img.example.com/c.jpg ,, "
+        df = pd.DataFrame([for_sale_row, for_rent_row, sold_row_nan_heavy], index=[7, 3, 9])
+        records = jsonify_df(df).to_dict(orient="records")
+        assert image_lists(df) == [normalize_row(r, "for_sale")["images"] for r in records]
+        assert image_lists(df)[1] == ["https://img.example.com/c.jpg"]
+
+
+class TestUpsertColumns:
+    """The upsert statements are built once from fixed column tuples."""
+
+    def test_listing_keys_match_listing_cols(self, for_sale_row):
+        assert set(process_listing(for_sale_row, "user", {})) == set(LISTING_COLS)
+
+    def test_minimal_listing_is_processed(self):
+        row = {"street": "1 A St", "city": "X", "state": "CA", "zip_code": "90001", "list_price": 100}
+        data = process_listing(row, "u", {})
+        assert data is not None
+        assert data["price"] == 100
+
+    def test_rental_keys_match_rental_cols(self, for_rent_row):
+        assert set(process_rental(for_rent_row, {})) == set(RENTAL_COLS)
+
+
+    def test_upserts_split_inserted_updated_skipped(self, monkeypatch):
+        class Conn:
+            def cursor(self):
+                return self
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def commit(self):
+                pass
+
+        # Three distinct rows: one new, one changed, one unchanged (no RETURNING row).
+        monkeypatch.setattr(scraper, "execute_values", lambda *a, **k: [(True,), (False,)])
+        for upsert, cols in ((upsert_listings, LISTING_COLS), (upsert_rentals, RENTAL_COLS)):
+            rows = [dict.fromkeys(cols, None) | {"address": a} for a in ("1 A", "2 B", "3 C")]
+            assert upsert(Conn(), rows, []) == (1, 1, 1)
+
+
+class TestJsonifyDf:
+    """Tests for jsonify_df() — the whole-frame NaN/datetime sanitizer."""
+
+    def test_nan_and_datetimes_become_json_safe(self):
+        df = pd.DataFrame({
+            "list_price": [1200.0, float("nan")],
+            "list_date": pd.to_datetime(["2025-06-15 08:30", None]),
+            "nearby_schools": [[{"name": "Park Elem"}], float("nan")],
+        })
+        records = jsonify_df(df).to_dict(orient="records")
+
+        assert records[0] == {
+            "list_price": 1200.0,
+            "list_date": "2025-06-15T08:30:00",
+            "nearby_schools": [{"name": "Park Elem"}],
+        }
+        assert records[1] == {"list_price": None, "list_date": None, "nearby_schools": None}
+        json.dumps(records)  # must not raise
+
+
+class TestWithRetries:
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        self.waits = []
+        monkeypatch.setattr(scraper, "sleep", self.waits.append)
+
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RuntimeError("boom")
+            return "ok"
+
+        assert with_retries(flaky, "test", attempts=4) == "ok"
+        assert len(calls) == 3
+        assert len(self.waits) == 2
+
+    def test_gives_up_and_reraises(self):
+        def always():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            with_retries(always, "test", attempts=3)
+        assert len(self.waits) == 2
+
+    def test_non_retryable_raises_immediately(self):
+        def bad():
+            raise ValueError("nope")
+
+        with pytest.raises(ValueError):
+            with_retries(bad, "test", attempts=4, retry_if=lambda e: False)
+        assert self.waits == []
+
+    def test_honours_retry_after(self):
+        class Resp:
+            headers = {"Retry-After": "7"}
+
+        class Throttled(Exception):
+            response = Resp()
+
+        calls = []
+
+        def throttled_once():
+            calls.append(1)
+            if len(calls) == 1:
+                raise Throttled()
+            return 1
+
+        with_retries(throttled_once, "test", attempts=2)
+        assert self.waits == [7.0]
+
+
+class TestGeocodeMany:
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch):
+        monkeypatch.setattr(scraper._geocode_cache, "mem", {})
+
+    def test_format_address_normalizes_zip(self, for_sale_row):
+        for_sale_row["zip_code"] = 8701.0
+        assert format_address(for_sale_row) == "123 Main St, Austin, TX 08701"
+
+    def test_format_addresses_matches_format_address(self, for_sale_row, sold_row_nan_heavy):
+        for_sale_row["zip_code"] = 8701.0
+        no_street = dict(for_sale_row, street=None)
+        df = pd.DataFrame([for_sale_row, sold_row_nan_heavy, no_street])
+        records = jsonify_df(df).to_dict(orient="records")
+        assert format_addresses(df) == [format_address(r) for r in records]
+
+    def test_dedupes_and_falls_back_to_nominatim(self, monkeypatch):
+        census, nominatim = [], []
+        monkeypatch.setattr(scraper, "_geocode_census", lambda a: census.append(a) or ((1.0, 2.0) if a == "a" else None))
+        monkeypatch.setattr(scraper, "_geocode_nominatim", lambda a: nominatim.append(a) or None)
+        result = geocode_many(["a", "b", "a", ""])
+        assert result == {"a": (1.0, 2.0), "b": None}
+        assert sorted(census) == ["a", "b"]
+        assert nominatim == ["b"]
+
+    def test_large_lists_use_the_census_batch(self, monkeypatch):
+        addrs = [f"{i} Main St, Austin, TX 78701" for i in range(scraper.CENSUS_BATCH_MIN)]
+        monkeypatch.setattr(scraper, "geocode_census_batch", lambda a: {x: (1.0, 2.0) for x in a})
+        monkeypatch.setattr(scraper, "_geocode_census", lambda a: pytest.fail("per-address Census call"))
+        assert set(geocode_many(addrs).values()) == {(1.0, 2.0)}
+
+    def test_cached_addresses_are_not_looked_up(self, monkeypatch):
+        monkeypatch.setattr(scraper, "geocode_cache_get", lambda a: {"a": (1.0, 2.0), "b": None})
+        monkeypatch.setattr(scraper, "geocode_cache_put", lambda hits, misses: None)
+        monkeypatch.setattr(scraper, "_geocode_census", lambda a: pytest.fail("live lookup of cached address"))
+        assert geocode_many(["a", "b"]) == {"a": (1.0, 2.0), "b": None}
+
+
+class TestRunScraper:
+    """run_scraper's seen-hash bookkeeping, with the scrape and DB faked out."""
+
+    def test_only_written_rows_are_marked_seen(self, monkeypatch, for_rent_row):
+        # Same address twice at different prices (two hashes), then an unrelated row.
+        relisted = dict(for_rent_row, list_price=2300.0)
+        other = dict(for_rent_row, street="9 Elm St")
+        df = pd.DataFrame([for_rent_row, relisted, other])
+
+        class Conn:
+            def close(self):
+                pass
+
+        written, marked = [], []
+        monkeypatch.setattr(scraper, "scrape_property", lambda **kw: df.copy())
+        monkeypatch.setattr(scraper, "geocode_many", lambda addrs: {})
+        monkeypatch.setattr(scraper, "get_db_connection", Conn)
+        monkeypatch.setattr(scraper, "upsert_rentals", lambda conn, rows, errors: written.extend(rows) or (len(rows), 0, 0))
+        monkeypatch.setattr(scraper._scrape_state, "seen_hashes", lambda kind, ttl: set())
+        monkeypatch.setattr(scraper._scrape_state, "mark_seen", lambda kind, hashes: marked.extend(hashes))
+
+        args = type("Args", (), dict(
+            location="80202", listing_type="for_rent", past_days=30, date_from=None, date_to=None,
+            min_price=None, max_price=None, beds=None, baths=None, limit=-1, ignore_seen=False,
+        ))()
+        scraper.run_scraper(args)
+
+        # The same hash run_scraper takes, after its ZIP normalization.
+        keys = df[["street", "city", "state", "zip_code", "list_price", "status"]].assign(
+            zip_code=df["zip_code"].astype("string").str.split(".").str[0].str.zfill(5))
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy().view("int64").tolist()
+        assert [r["address"].split(",")[0] for r in written] == ["456 Oak Ave", "9 Elm St"]
+        # The first 456 Oak Ave row was dropped as a duplicate and never written.
+        assert sorted(marked) == sorted(hashes[1:])
@@ -0,0 +1,61 @@
+"""Unit tests for the queued /scrape/jobs endpoints.
+
+No worker threads are started: each test enqueues its jobs, then drains the
+queue synchronously with _job_worker() up to a None sentinel.
+"""
+import queue
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def fresh_jobs(monkeypatch):
+    monkeypatch.setattr(main, "_jobs", main.OrderedDict())
+    monkeypatch.setattr(main, "_job_queue", queue.Queue(maxsize=2))
+    monkeypatch.setattr(main, "_start_job_workers", lambda: None)
+
+
+def _drain():
+    main._job_queue.put(None)
+    main._job_worker()
+
+
+def test_queued_job_reports_result(monkeypatch):
+    monkeypatch.setattr(main, "scrape_listings", lambda req: {"count": 3, "inserted": 3})
+    job = main.enqueue_scrape(main.ScrapeRequest(location="78701"))
+    assert main.scrape_job(job["job_id"])["status"] == "queued"
+
+    _drain()
+    assert main.scrape_job(job["job_id"]) == {
+        "job_id": job["job_id"], "status": "done", "result": {"count": 3, "inserted": 3},
+    }
+
+
+def test_failed_scrape_keeps_status_code(monkeypatch):
+    def blocked(req):
+        raise HTTPException(status_code=429, detail={"blocked": True})
+
+    monkeypatch.setattr(main, "scrape_listings", blocked)
+    job = main.enqueue_scrape(main.ScrapeRequest(location="78701"))
+    _drain()
+    status = main.scrape_job(job["job_id"])
+    assert status["status"] == "failed"
+    assert status["status_code"] == 429
+
+
+def test_full_queue_is_rejected():
+    for _ in range(2):
+        main.enqueue_scrape(main.ScrapeRequest(location="78701"))
+    with pytest.raises(HTTPException) as exc:
+        main.enqueue_scrape(main.ScrapeRequest(location="78701"))
+    assert exc.value.status_code == 503
+    assert len(main._jobs) == 2
+
+
+def test_unknown_job_is_404():
+    with pytest.raises(HTTPException) as exc:
+        main.scrape_job("nope")
+    assert exc.value.status_code == 404
@@ -0,0 +1,47 @@
+"""Unit tests for the /scrape route: the hand-off to the scrape executor and
+the arguments scrape_listings passes to HomeHarvest."""
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def test_scrape_runs_on_the_scrape_executor(monkeypatch):
+    seen = {}
+
+    def fake_scrape(req):
+        seen["thread"] = threading.current_thread().name
+        return {"count": 2, "location": req.location}
+
+    monkeypatch.setattr(main, "scrape_listings", fake_scrape)
+    result = asyncio.run(main.scrape(main.ScrapeRequest(location="78701")))
+    assert result == {"count": 2, "location": "78701"}
+    assert seen["thread"].startswith("scrape")
+
+
+def test_block_signal_still_reaches_the_caller(monkeypatch):
+    def blocked(req):
+        raise HTTPException(status_code=429, detail="blocked")
+
+    monkeypatch.setattr(main, "scrape_listings", blocked)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(main.scrape(main.ScrapeRequest(location="78701")))
+    assert exc.value.status_code == 429
+
+
+def test_price_and_beds_filters_are_pushed_into_the_scrape(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(main, "scrape_property", lambda **kw: seen.update(kw) or pd.DataFrame())
+    main.scrape_listings(main.ScrapeRequest(location="78701", min_price=99999.5, max_price=250000.2, beds_min=3))
+    assert (seen["price_min"], seen["price_max"], seen["beds_min"]) == (99999, 250001, 3)
+
+
+def test_unset_filters_are_not_passed(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(main, "scrape_property", lambda **kw: seen.update(kw) or pd.DataFrame())
+    main.scrape_listings(main.ScrapeRequest(location="78701"))
+    assert not {"price_min", "price_max", "beds_min"} & seen.keys()
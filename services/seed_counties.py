@@ -1,8 +1,8 @@
 import requests
 import csv
-import io
 import os
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
 import sys
 
 # Database Config (Internal Docker Network)
@@ -17,10 +17,42 @@ DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 # US Census Bureau County Data URL
 CENSUS_URL = "https://www2.census.gov/geo/docs/reference/codes/files/national_county.txt"
 
+# A one-shot script makes a single connection, so skip the pool.
+engine = create_engine(DATABASE_URL, poolclass=NullPool)
+
 def seed_counties():
+    print(f"Fetching county data from {CENSUS_URL}...")
+    # Content is CSV: State, StateANSI, CountyANSI, CountyName, ClassCode
+    # e.g. AL,01,001,Autauga County,H1
+    #
+    # Parsed line by line as the body streams in, rather than buffering it
+    # as response.text and copying that into a StringIO. The file is
+    # Latin-1 (e.g. "Doña Ana County"), as requests decoded it before.
+    counties = []
+    try:
+        with requests.get(CENSUS_URL, stream=True) as response:
+            response.raise_for_status()
+            lines = (line.decode('latin-1') for line in response.iter_lines())
+            for row in csv.reader(lines, delimiter=','):
+                if len(row) < 4:
+                    continue
+
+                state = row[0]
+                county_name = row[3]
+
+                # Format: "Autauga County, AL"
+                counties.append(f"{county_name}, {state}")
+    except Exception as e:
+        print(f"Failed to fetch Census data: {e}")
+        sys.exit(1)
+
+    print(f"Found {len(counties)} counties.")
+
+    # Schema check and insert share one transaction on one connection. The
+    # Census download above runs first so no transaction is held open
+    # across it.
     print("Connecting to database...")
     try:
-        engine = create_engine(DATABASE_URL)
         with engine.begin() as conn:
             # Verify table exists
             conn.execute(text("SELECT 1"))
@@ -76,63 +108,26 @@ def seed_counties():
             """))
             print("Schema initialized.")
 
+            # One statement for the whole list instead of a SELECT + INSERT
+            # round trip per county. crawl_jobs has no unique key on the
+            # region (it holds repeat jobs for the same region), so the
+            # existence check stays a NOT EXISTS guard, as in the zip_code
+            # seed migrations.
+            print("Inserting into crawl_jobs...")
+            result = conn.execute(text("""
+                INSERT INTO crawl_jobs (region_type, region_value, status)
+                SELECT 'county', c.region_value, 'pending'
+                  FROM (SELECT DISTINCT unnest(CAST(:vals AS text[])) AS region_value) c
+                 WHERE NOT EXISTS (SELECT 1 FROM crawl_jobs j
+                                    WHERE j.region_value = c.region_value
+                                      AND j.region_type = 'county')
+            """), {"vals": counties})
+            inserted = result.rowcount
     except Exception as e:
-        print(f"Database initialization failed: {e}")
-        sys.exit(1)
-
-    print(f"Fetching county data from {CENSUS_URL}...")
-    try:
-        response = requests.get(CENSUS_URL)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"Failed to fetch Census data: {e}")
+        print(f"Database seeding failed: {e}")
         sys.exit(1)
 
-    # Content is CSV: State, StateANSI, CountyANSI, CountyName, ClassCode
-    # e.g. AL,01,001,Autauga County,H1
-    
-    content = response.text
-    # Some lines might be weird, let's use csv reader
-    f = io.StringIO(content)
-    reader = csv.reader(f, delimiter=',')
-    
-    counties = []
-    for row in reader:
-        if len(row) < 4:
-            continue
-        
-        state = row[0]
-        county_name = row[3]
-        
-        # Format: "Autauga County, AL"
-        target = f"{county_name}, {state}"
-        counties.append(target)
-
-    print(f"Found {len(counties)} counties.")
-    
-    # Batch Insert
-    print("Inserting into crawl_jobs...")
-    inserted = 0
-    skipped = 0
-    
-    with engine.begin() as conn:
-        for county_str in counties:
-            # Check exist
-            check_sql = text("SELECT id FROM crawl_jobs WHERE region_value = :val AND region_type = 'county'")
-            res = conn.execute(check_sql, {"val": county_str}).fetchone()
-            
-            if not res:
-                ins_sql = text("""
-                    INSERT INTO crawl_jobs (region_type, region_value, status) 
-                    VALUES ('county', :val, 'pending')
-                """)
-                conn.execute(ins_sql, {"val": county_str})
-                inserted += 1
-            else:
-                skipped += 1
-                
-            if (inserted + skipped) % 100 == 0:
-                print(f"Processed {inserted + skipped}...", end='\r')
+    skipped = len(counties) - inserted
 
     print(f"\nSeeding complete!")
     print(f"Inserted: {inserted}")
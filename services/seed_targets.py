@@ -66,56 +66,33 @@ def seed():
             "frequency_hours": 168 # Once a week
         })
 
-    inserted_count = 0
+    # market_targets.location is UNIQUE, so a city gets one row whatever
+    # listing types it is wanted for: the first (for_sale) entry wins and
+    # the sold entries only matter once the schema allows a row per type.
+    rows = {}
     for t in cleaned_targets:
-        try:
-            # Upsert on location/listing_type ideally, but our constraint is only on location currently?
-            # Wait, the schema said: location TEXT UNIQUE. 
-            # If so, we can't have two rows for "Cleveland, OH" with different listing types.
-            # I need to check the schema I outputted.
-            # "location TEXT UNIQUE NOT NULL"
-            # Ah, that's a bug in my schema design if I want multiple types per city.
-            # I should fix the schema OR just combine them.
-            # But wait, the schema is already applied by the user. 
-            # I should probably just insert "Cleveland, OH" (for_sale) for now.
-            # If I want 'sold', I might need to append suffix or change schema.
-            # 
-            # Strategy: Just insert the locations. The scraper (scheduler) can decide what to scrape?
-            # No, text says "listing_type DEFAULT 'for_sale'".
-            # 
-            # I will just insert the locations as 'for_sale' for now.
-            # If the user wants sold, they can toggle it or I can add a new row "Cleveland, OH (Sold)"?
-            # No, that will break the scraper location arg.
-            # 
-            # FIX: I will check if I can modify the constraint.
-            # But I can't easily.
-            # 
-            # Alternative: I'll just insert the 14 cities.
-            # And maybe I update the scraper to scrape BOTH if the target exists?
-            # Or simplified: I just insert them as 'for_sale' (which scrapes 'for_rent' too usually).
-            # For 'sold', we might need a separate mechanism or just change the listing_type of the row periodically?
-            # 
-            # Let's stick to the 14 cities as 'for_sale' for now to get data flowing.
-            # I will treat "Cleveland, OH" as the primary target.
-            
-            data = {
-                "location": t['location'],
-                "listing_type": "for_sale",
-                "priority": t['priority'],
-                "frequency_hours": 24
-            }
-            
-            # Check if exists to avoid error if unique constraint
-            existing = supabase.table("market_targets").select("id").eq("location", t['location']).execute()
-            if not existing.data:
-                supabase.table("market_targets").insert(data).execute()
-                print(f"Inserted: {t['location']}")
-                inserted_count += 1
-            else:
-                print(f"Skipped (Exists): {t['location']}")
-                
-        except Exception as e:
-            print(f"Error inserting {t['location']}: {e}")
+        rows.setdefault(t['location'], {
+            "location": t['location'],
+            "listing_type": "for_sale",
+            "priority": t['priority'],
+            "frequency_hours": 24
+        })
+
+    # One request for every target instead of a select + insert per city.
+    # ignore_duplicates makes it ON CONFLICT DO NOTHING, so existing targets
+    # (and any priority tuned on them since) are left alone, and only the
+    # newly inserted rows come back.
+    inserted_count = 0
+    try:
+        res = supabase.table("market_targets").upsert(
+            list(rows.values()), on_conflict="location", ignore_duplicates=True
+        ).execute()
+        for row in res.data or []:
+            print(f"Inserted: {row['location']}")
+        inserted_count = len(res.data or [])
+        print(f"Skipped (Exists): {len(rows) - inserted_count}")
+    except Exception as e:
+        print(f"Error inserting targets: {e}")
 
     print(f"Seeding complete. Added {inserted_count} new targets.")
 
@@ -0,0 +1,103 @@
+"""Unit tests for estimate_rent_v2_batch against a fake database.
+
+    cd services && python -m pytest test_rent_estimator_v2.py -v
+"""
+import rent_estimator_v2 as rev2
+
+HUD = {("78701", 2): 1800.0, ("78701", 3): 2200.0, ("78702", 1): 1400.0}
+
+# (address, price, bedrooms, bathrooms, sqft, latitude, longitude)
+RENTALS = [
+    ("1 A St", 1900, 2, 1, 900, 30.27, -97.74),
+    ("2 B St", 2100, 3, 2, 1300, 30.28, -97.73),
+    ("3 C St", 2300, 3, 2, 1400, 30.26, -97.75),
+    ("4 D St", 900, 2, 1, 800, 30.27, -97.74),  # under 70% of HUD: a "scam"
+    ("5 E St", 1500, 1, 1, 650, 30.25, -97.72),
+    ("6 F St", 2500, 4, 3, 2000, 31.90, -97.10),  # outside every 50-mile circle
+]
+
+
+def _in_box(row, lat_lo, lat_hi, lon_lo, lon_hi, beds_lo, beds_hi):
+    return lat_lo <= row[5] <= lat_hi and lon_lo <= row[6] <= lon_hi and beds_lo <= row[2] <= beds_hi
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rows = []
+
+    def execute(self, sql, params):
+        if "LIMIT 1" in sql:
+            self.log.append("hud")
+            self.rows = [(HUD[params],)] if params in HUD else []
+        elif "DISTINCT ON" in sql:
+            self.log.append("hud_batch")
+            self.rows = [(z, b, v) for (z, b), v in HUD.items() if z in params[0]]
+        elif "unnest" in sql:
+            self.log.append("comps_batch")
+            idxs, lat_lo, lat_hi, lon_lo, lon_hi, beds, _ = params
+            self.rows = [(idx, *row)
+                         for idx, *box, b in zip(idxs, lat_lo, lat_hi, lon_lo, lon_hi, beds)
+                         for row in RENTALS if _in_box(row, *box, max(b - 1, 0), b + 1)]
+        else:
+            self.log.append("comps")
+            self.rows = [row for row in RENTALS if _in_box(row, *params[:6])]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+def _fake_db(monkeypatch):
+    log = []
+
+    class Conn:
+        def cursor(self):
+            return FakeCursor(log)
+
+    monkeypatch.setattr(rev2, "get_db_connection", Conn)
+    monkeypatch.setattr(rev2, "release_db_connection", lambda conn: None)
+    monkeypatch.setattr(rev2, "_NON_RENTABLE_TYPES", rev2.NON_RENTABLE_TYPES)
+    monkeypatch.setattr(rev2, "HAS_ML_MODEL", False)
+    rev2._hud_safmr_lookup.cache_clear()
+    return log
+
+
+RECORDS = [
+    {"lat": 30.27, "lon": -97.74, "bedrooms": 3, "zip_code": "78701", "property_type": "SINGLE_FAMILY"},
+    {"lat": 30.27, "lon": -97.74, "bedrooms": 2, "zip_code": 78701.0},
+    {"lat": 30.27, "lon": -97.74, "bedrooms": 3, "property_type": "LAND"},
+    {"lat": 30.25, "lon": -97.72, "bedrooms": 1, "zip_code": "78702", "sqft": 650},
+    {"lat": 30.27, "lon": -97.74, "bedrooms": None, "zip_code": "78701"},
+    {"lat": 45.00, "lon": -93.00, "bedrooms": 2, "zip_code": "55401"},
+]
+
+
+def _single(r):
+    return rev2.estimate_rent_v2(
+        r["lat"], r["lon"], r.get("bedrooms"),
+        bathrooms=r.get("bathrooms"), sqft=r.get("sqft"), zip_code=r.get("zip_code"),
+        property_type=r.get("property_type"), year_built=r.get("year_built"),
+    )
+
+
+def test_batch_matches_per_record_estimates_in_input_order(monkeypatch):
+    log = _fake_db(monkeypatch)
+    monkeypatch.setattr(rev2, "COMPS_BATCH_CHUNK", 2)
+    expected = [_single(r) for r in RECORDS]
+    log.clear()
+
+    assert rev2.estimate_rent_v2_batch(RECORDS) == expected
+    assert expected[2].method == "non_rentable_property_type"
+    assert expected[0].comp_count > 0 and expected[5].method == "insufficient_data"
+    # 5 rentable records in chunks of 2: one HUD query, three comps queries.
+    assert log == ["hud_batch", "comps_batch", "comps_batch", "comps_batch"]
+
+
+def test_all_non_rentable_batch_skips_the_database(monkeypatch):
+    log = _fake_db(monkeypatch)
+    result = rev2.estimate_rent_v2_batch([{"lat": 0, "lon": 0, "bedrooms": 0, "property_type": "VACANT LOT"}])
+    assert [r.method for r in result] == ["non_rentable_property_type"]
+    assert log == []